@@ -0,0 +1,340 @@
+# Benchmarks for the hot paths of the editor (typing, markdown shortcuts, word removal, undo, counting, saving)
+#
+# usage: python benchmark.py [--sizes 1000 10000 100000 1000000] [--keystrokes 2000] [--output bench_results.json] [--compare old_results.json]
+#
+# The parts that don't need a window (Document, WordCounter, UndoJournal, EditJournal) are always measured.
+# BetterText and Writer need a display; on a machine without one run it under Xvfb (xvfb-run python benchmark.py),
+# otherwise those measurements are skipped and marked as such in the results.
+#
+# A recorded keystroke stream can be replayed with --replay stream.json; the file is a JSON list of [action, argument] pairs with the actions
+# 'type' (argument: the chars), 'backspace', 'move' (argument: a tkinter index), 'select' (argument: [index1, index2]), 'italic', 'bold',
+# 'underline', 'wordRemovalLeft', 'wordRemovalRight', 'undo' and 'redo'.
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import tkinter as tk
+from tkinter import ttk
+
+import main
+
+WORDS = ('the', 'a', 'and', 'of', 'to', 'in', 'it', 'was', 'she', 'he', 'they', 'writing', 'stuff', 'house', 'night', 'morning', 'letter',
+         'window', 'quietly', 'never', 'always', 'because', 'remembered', 'forgotten', 'river', 'city', 'old', 'new', 'small', 'strange',
+         'looked', 'walked', 'said', 'thought', 'into', 'over', 'under', 'before', 'after', 'something', 'nothing', 'everything', 'door')
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# manuscripts
+def generateManuscript(words, seed=0):
+    # a markdown manuscript of roughly the given amount of words: chapters, paragraphs and some *italic* / **bold** text
+    rng = random.Random(seed)
+    paragraphs = []
+    written = 0
+    chapter = 1
+    while written < words:
+        if len(paragraphs) % 20 == 0:
+            paragraphs.append(f'# Chapter {chapter}')
+            chapter += 1
+        length = min(rng.randint(50, 150), words - written)
+        paragraph = [rng.choice(WORDS) for _ in range(length)]
+        if length > 10:
+            position = rng.randrange(length - 2)
+            paragraph[position] = f'*{paragraph[position]}*' if rng.random() < 0.5 else f'**{paragraph[position]}**'
+        paragraphs.append(' '.join(paragraph).capitalize() + '.')
+        written += length
+    return '\n\n'.join(paragraphs) + '\n'
+
+def generateKeystrokes(count, seed=0):
+    # a synthetic keystroke stream that mostly types, but also corrects, moves around and uses the shortcuts
+    rng = random.Random(seed)
+    keystrokes = []
+    while len(keystrokes) < count:
+        roll = rng.random()
+        if roll < 0.80:
+            for char in rng.choice(WORDS) + ' ':
+                keystrokes.append(['type', char])
+        elif roll < 0.86:
+            keystrokes.append(['backspace', None])
+        elif roll < 0.89:
+            keystrokes.append(['move', rng.choice(('insert - 1 chars', 'insert + 1 chars', 'insert - 1 lines', 'insert + 1 lines'))])
+        elif roll < 0.92:
+            keystrokes.append(['wordRemovalLeft', None])
+        elif roll < 0.93:
+            keystrokes.append(['wordRemovalRight', None])
+        elif roll < 0.96:
+            keystrokes.append(['select', ['insert - 1 chars wordstart', 'insert - 1 chars wordend']])
+            keystrokes.append([rng.choice(('italic', 'bold', 'underline')), None])
+        elif roll < 0.98:
+            keystrokes.append(['undo', None])
+        else:
+            keystrokes.append(['redo', None])
+    return keystrokes[:count]
+
+# measuring
+class Timings(): # collects the durations of one operation
+    def __init__(self) -> None:
+        self.durations = []
+
+    def measure(self, function, *args):
+        startTime = time.perf_counter()
+        result = function(*args)
+        self.durations.append(time.perf_counter() - startTime)
+        return result
+
+    def summary(self):
+        if not self.durations:
+            return None
+        durations = sorted(self.durations)
+        def percentile(p): return durations[min(len(durations) - 1, int(p / 100 * len(durations)))] * 1e6
+        return {
+            'count': len(durations),
+            'meanMicroseconds': sum(durations) / len(durations) * 1e6,
+            'p50Microseconds': percentile(50),
+            'p95Microseconds': percentile(95),
+            'p99Microseconds': percentile(99),
+            'maxMicroseconds': durations[-1] * 1e6,
+        }
+
+def measureMemory(function):
+    # the memory (in bytes) python allocated while running function and didn't free again; what function returns is kept alive until it's measured
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    after = tracemalloc.get_traced_memory()[0]
+    del result
+    tracemalloc.stop()
+    return after - before
+
+# headless benchmarks
+def benchmarkHeadless(text, keystrokes):
+    results = {}
+    rng = random.Random(1)
+    typed = [argument for action, argument in keystrokes if action == 'type']
+
+    timings = Timings()
+    document = timings.measure(main.Document, text)
+    results['Document (build)'] = timings.summary()
+
+    timings = Timings()
+    for char in typed:
+        timings.measure(document.insert, rng.randrange(len(document) + 1), char)
+    results['Document.insert'] = timings.summary()
+
+    timings = Timings()
+    for _ in typed:
+        timings.measure(document.delete, rng.randrange(len(document)), 1)
+    results['Document.delete'] = timings.summary()
+
+    timings = Timings()
+    for _ in typed:
+        timings.measure(document.index, rng.randrange(len(document) + 1))
+    results['Document.index'] = timings.summary()
+
+    timings = Timings()
+    counter = main.WordCounter()
+    timings.measure(counter.reset, text)
+    results['WordCounter.reset'] = timings.summary()
+    timings = Timings()
+    for char in typed:
+        timings.measure(counter.inserted, 'a', char, ' ')
+    results['WordCounter.inserted'] = timings.summary()
+
+    def typeIntoJournal(journal, timings=None):
+        index = '1.0'
+        for char in typed:
+            delta = main.TextDelta('insert', index, char)
+            if timings is None:
+                journal.record(delta)
+            else:
+                timings.measure(journal.record, delta)
+            index = main.advanceIndex(index, char)
+        return journal
+
+    timings = Timings()
+    typeIntoJournal(main.UndoJournal(), timings)
+    results['UndoJournal.record'] = timings.summary()
+
+    with tempfile.TemporaryDirectory() as directory:
+        editJournal = main.EditJournal(os.path.join(directory, 'manuscript.md'))
+        timings = Timings()
+        typeIntoJournal(editJournal, timings)
+        results['EditJournal.record'] = timings.summary()
+        timings = Timings()
+        timings.measure(editJournal.flush)
+        results['EditJournal.flush'] = timings.summary()
+        editJournal.close()
+
+    results['memory: UndoJournal (bytes)'] = measureMemory(lambda: typeIntoJournal(main.UndoJournal()))
+    return results
+
+# tkinter benchmarks
+class BenchmarkWriter(main.Writer): # a Writer that doesn't start its mainloop, so the benchmark can drive it
+    def run(self):
+        pass
+
+def displayAvailable():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return False
+    root.destroy()
+    return True
+
+def pump(root):
+    # lets tk handle everything that is waiting (after callbacks, redraws)
+    root.update()
+
+def benchmarkWriter(text, keystrokes):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        fileLocation = os.path.join(directory, 'manuscript.md')
+        with open(fileLocation, 'w', encoding=main.ENCODING) as file:
+            file.write(text)
+
+        startTime = time.perf_counter()
+        writer = BenchmarkWriter(blockStyle=0, fileLocation=fileLocation, autosaveInterval=3600, displayHeader=False)
+        firstFrame = time.perf_counter() - startTime
+        while not writer.loaded:
+            pump(writer.root)
+        results['Writer (first frame, ms)'] = firstFrame * 1000
+        results['Writer (fully loaded, ms)'] = (time.perf_counter() - startTime) * 1000
+
+        # the word bar only exists for word goals; the benchmark runs without blocking, so it gets one here
+        writer.blockValue = 1000
+        writer.progressValue = writer.textbox.wordCount()
+        writer.progressBar = ttk.Progressbar(writer.root, maximum=1)
+        writer.quitButton = tk.Button(writer.root)
+
+        textbox = writer.textbox
+        textbox.mark_set('insert', 'end - 1 chars')
+        textbox.focus_force()
+        pump(writer.root)
+
+        timings = {name: Timings() for name in ('keystroke (insert + add_changes)', 'backspace', 'move cursor', 'markText',
+                                                 'wordRemovalLeft', 'wordRemovalRight', 'undo', 'redo')}
+        def replay():
+            for action, argument in keystrokes:
+                if action == 'type':
+                    # the insert and the idle flush of the edit to the listeners (i.e. the journal), which is all the work a key press causes
+                    timings['keystroke (insert + add_changes)'].measure(lambda: (textbox.insert('insert', argument), textbox.add_changes()))
+                elif action == 'backspace':
+                    timings['backspace'].measure(textbox.delete, 'insert - 1 chars', 'insert')
+                elif action == 'move':
+                    timings['move cursor'].measure(textbox.mark_set, 'insert', argument)
+                elif action == 'select':
+                    textbox.tag_remove('sel', '1.0', 'end')
+                    textbox.tag_add('sel', *argument)
+                elif action in ('italic', 'bold', 'underline'):
+                    syntax = {'italic': ('*', '*'), 'bold': ('**', '**'), 'underline': ('<u>', '</u>')}[action]
+                    if textbox.tag_ranges('sel'):
+                        timings['markText'].measure(textbox.markText, *syntax)
+                elif action in ('wordRemovalLeft', 'wordRemovalRight', 'undo', 'redo'):
+                    timings[action].measure(getattr(textbox, action))
+        memory = measureMemory(replay)
+        pump(writer.root)
+
+        for name, timing in timings.items():
+            results[name] = timing.summary()
+        results['memory: keystroke replay (bytes)'] = memory
+
+        timings = Timings()
+        for _ in range(20):
+            timings.measure(writer.updateWordBar)
+        results['updateWordBar'] = timings.summary()
+
+        # saving: the part on the UI thread (taking the snapshot) and the whole write on the saver thread
+        uiTimings = Timings()
+        totalTimings = Timings()
+        for _ in range(5):
+            startTime = time.perf_counter()
+            uiTimings.measure(writer.saveTextToFile)
+            writer.saver.wait()
+            totalTimings.durations.append(time.perf_counter() - startTime)
+        results['saveTextToFile (UI thread)'] = uiTimings.summary()
+        results['saveTextToFile (until written)'] = totalTimings.summary()
+
+        writer.editJournal.close()
+        writer.saver.close()
+        writer.root.destroy()
+    return results
+
+# results
+def gitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compareResults(old, new):
+    # prints how the median and p95 of every operation changed between two result files
+    print(f'\nComparing {old["meta"].get("commit")} -> {new["meta"].get("commit")}')
+    for size, operations in new['sizes'].items():
+        for group in ('headless', 'tkinter'):
+            newGroup = operations.get(group)
+            oldGroup = (old['sizes'].get(size) or {}).get(group)
+            if not isinstance(newGroup, dict) or not isinstance(oldGroup, dict): # e.g. skipped for lack of a display
+                continue
+            for name, value in newGroup.items():
+                oldValue = oldGroup.get(name)
+                if not isinstance(value, dict) or not isinstance(oldValue, dict):
+                    continue
+                for key in ('p50Microseconds', 'p95Microseconds'):
+                    if oldValue[key]:
+                        print(f'{size:>8} words  {name:<40} {key[:3]}: {oldValue[key]:10.1f} -> {value[key]:10.1f} us ({value[key] / oldValue[key]:.2f}x)')
+
+def runBenchmarks():
+    parser = argparse.ArgumentParser(description='Benchmarks the editing hot paths of A_WritingProgram.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='manuscript sizes in words')
+    parser.add_argument('--keystrokes', type=int, default=2000, help='length of the synthetic keystroke stream')
+    parser.add_argument('--replay', help='a recorded keystroke stream (JSON) to replay instead of a synthetic one')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the results')
+    parser.add_argument('--compare', help='results of an earlier run to compare with')
+    parser.add_argument('--headless', action='store_true', help="skip the benchmarks that need a display")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, 'r', encoding=main.ENCODING) as file:
+            keystrokes = json.load(file)
+    else:
+        keystrokes = generateKeystrokes(args.keystrokes)
+
+    withDisplay = not args.headless and displayAvailable()
+    if not withDisplay:
+        print('No display available (or --headless given); only the headless benchmarks are run.')
+
+    results = {
+        'meta': {
+            'commit': gitCommit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'keystrokes': len(keystrokes),
+            'display': withDisplay,
+        },
+        'sizes': {},
+    }
+    for size in args.sizes:
+        print(f'Benchmarking a manuscript of {size} words...')
+        text = generateManuscript(size)
+        results['sizes'][str(size)] = {
+            'headless': benchmarkHeadless(text, keystrokes),
+            'tkinter': benchmarkWriter(text, keystrokes) if withDisplay else 'skipped (no display)',
+        }
+
+    with open(args.output, 'w', encoding=main.ENCODING) as file:
+        json.dump(results, file, indent=2)
+    print(f'Results written to "{args.output}".')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding=main.ENCODING) as file:
+            compareResults(json.load(file), results)
+
+if __name__ == '__main__':
+    runBenchmarks()
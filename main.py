@@ -1,26 +1,1076 @@
+import time
+LAUNCH_TIME = time.perf_counter() # taken before anything else is imported, so the startup time reported by the Writer includes the imports
+
 import tkinter as tk
-from tkinter import filedialog as fd
 from tkinter import ttk
-import re
+import tkinter.font as tkfont
 import os
+import re
 import json
-import webbrowser
+import queue
+import shutil
+import threading
+import random
+import heapq
+import bisect
+import zlib
+import hashlib
+import mmap
+import math
+import struct
+from collections import namedtuple
 
 ENCODING = 'utf-8'
 
 SETTINGS_FILENAME = 'settings.json' # if i for some reason happen to want to call the file "config" in the future
+DEFAULT_SETTINGS = {"displayHeader": True, "autosaveInterval": 300, "instrumentation": 'off', "dictionary": '', "virtualEditing": False}
+
+VIRTUAL_WINDOW_LINES = 1000 # lines of the document in the textbox at once, when editing virtually
+VIRTUAL_MARGIN_LINES = 150 # once the view gets this close to either end of those lines, other lines are swapped in around it
+
+DOCUMENT_CHUNK_SIZE = 1024 # the rope stores the text in pieces of about this many chars
+
+UNDO_MEMORY_LIMIT = 8 * 1024 * 1024 # roughly how many bytes the undo history may use before the oldest steps are dropped
+UNDO_DELTA_OVERHEAD = 64 # rough guess of what a single delta costs on top of its text (tuple, strings, list slot)
+
+SAVE_POLL_INTERVAL = 100 # ms between checks, if a background save has finished
+SEARCH_POLL_INTERVAL = 20 # ms between checks for new matches while a search is running
+SEARCH_BATCH = 200 # matches sent from the search thread at once
+SEARCH_BATCHES_PER_POLL = 5 # batches highlighted per check, so a search with lots of matches doesn't stall typing
+
+LOAD_CHUNK_SIZE = 64 * 1024 # chars inserted into the textbox per step while a file is loaded
+
+JOURNAL_SUFFIX = '.journal' # the edit journal of "chapter.md" is "chapter.md.journal"
+HISTORY_SUFFIX = '.history' # the saved versions of "chapter.md" are kept in the directory "chapter.md.history"
+HISTORY_CHUNK_MIN = 1024 # chars; a version is split into chunks of whole paragraphs, at least this long...
+HISTORY_CHUNK_MAX = 16 * 1024 # ...and at most this long (longer paragraphs are cut)
+HISTORY_CHUNK_SPREAD = 4 # on average every 4th paragraph (after the minimum) ends a chunk
+HISTORY_RECIPE_SPREAD = 16 # on average 16 chunk hashes are stored together as one piece of a version's recipe
+PROJECT_MANIFEST = 'chapters.txt' # lists the chapter files of a project in order (one per line); without it every markdown/text file in the directory is a chapter
+PROJECT_CACHE_FILENAME = '.writer_cache.json' # the word counts of a project's chapters, so they don't have to be read every time the project is opened
+CHAPTER_EXTENSIONS = ('.md', '.txt')
+
+JOURNAL_FLUSH_INTERVAL = 1 # seconds between the journal's buffer being written out; that's the most you can lose, if the program crashes
+
+PROGRESS_INTERVAL = 1 # seconds between progressBar updates while you are writing
+IDLE_PROGRESS_INTERVAL = 5 # seconds between progressBar updates while you aren't
+IDLE_AFTER = 30 # seconds without an edit after which you count as idle (the periodic tasks then wake up less often)
+
+HIGHLIGHT_MARGIN = 30 # lines above and below the visible part of the text that are highlighted as well (so scrolling a bit doesn't show plain text)
+HIGHLIGHT_SLICE = 40 # lines highlighted in one go before tk gets the chance to handle events again
+
+REPETITION_WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*") # the words counted by WordFrequencies (case doesn't matter)
+WORD_CHARS_BEFORE = re.compile(r"[\w'’]*\Z") # the part of a word in front of an edit
+WORD_CHARS_AFTER = re.compile(r"[\w'’]*") # the part of a word behind an edit
+ASTRAL_CHARS = re.compile(r"[\U00010000-\U0010ffff]") # chars tk (8.6) counts as two columns (see tkLength)
+WORD_CONTEXT = 32 # chars looked at per step when searching for the start/end of the word around an edit
+REPETITION_WINDOW = 50 # a word is highlighted, if it occurs again within this many words before or after it
+REPETITION_CONTEXT = 600 # chars before and after a line that are looked at for repetitions (about REPETITION_WINDOW words)
+REPETITION_LINES = 2 # lines around an edit that are checked again, as a repetition can span paragraphs
+REPETITION_TOP = 15 # words shown in the frequency panel
+REPETITION_MIN_LENGTH = 3 # shorter words are never counted as repeated
+# words that simply have to occur all the time; they are counted, but never highlighted or shown in the frequency panel
+REPETITION_IGNORED = frozenset('''the and but for nor yet are was were been being has had have his her hers him she they them their theirs its
+you your yours our ours who whom whose which what that this these those then than there here when where why how with from into onto upon about
+not all any can could would should will shall may might must did does done one out off over under just also very too some such own same
+let get got say said it's i'm don't didn't isn't wasn't can't won't'''.split())
+
+BLOOM_SUFFIX = '.bloom' # the word list "words.txt" is turned into "words.txt.bloom" the first time it is used
+BLOOM_HEADER = struct.Struct('<8sQIQq') # magic, bits, hashes per word, size and modification time of the word list it was made from
+BLOOM_MAGIC = b'AWPBLOOM'
+BLOOM_ERROR_RATE = 0.001 # the share of misspelled words that slip through as correct
+SPELLING_WORD = re.compile(r"(?<!\w)[^\W\d_]+(?:['’][^\W\d_]+)*(?!\w)") # letters, possibly with apostrophes in between (don't, writer's)
+SPELLING_IGNORED = re.compile(r'<[^>]*>|`[^`]*`|\]\([^)]*\)|https?://\S+') # html tags, code, link targets and urls aren't spell checked
+
+# markdown syntax highlighted in the textbox: (pattern, tag, length of the syntax in front, length of the syntax behind)
+MARKDOWN_HEADING = re.compile(r'^(#{1,6})\s')
+MARKDOWN_INLINE = (
+    (re.compile(r'\*\*(?!\s)(.+?)(?<!\s)\*\*'), 'mdBold', 2, 2),
+    (re.compile(r'(?<![*\\])\*(?![\s*])(.+?)(?<![\s*\\])\*(?!\*)'), 'mdItalic', 1, 1),
+    (re.compile(r'<u>(.+?)</u>'), 'mdUnderline', 3, 4),
+)
+MARKDOWN_TAGS = ('mdHeading', 'mdBold', 'mdItalic', 'mdUnderline', 'mdSyntax')
+EXPORT_FORMATS = {'.html': 'html', '.htm': 'html', '.txt': 'txt'} # the file extensions you can export to and their format
+EXPORT_RULE = re.compile(r'^ {0,3}([-*_])( *\1){2,} *$') # a horizontal rule (---, ***, ___)
+EXPORT_LIST_ITEM = re.compile(r'^\s*([-*+]|\d+[.)])\s+')
+EXPORT_INLINE = re.compile(r'`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)|\*\*(?!\s)(.+?)(?<!\s)\*\*|(?<![*\\])\*(?![\s*])(.+?)(?<![\s*\\])\*(?!\*)|<u>(.+?)</u>')
+EXPORT_ESCAPED = re.compile(r'\\([\\`*_\[\]()#>+-])') # \* is a literal *
+MARKDOWN_HEADINGS = re.compile(r'^(#{1,6})[ \t](.*)$', re.MULTILINE) # finds all headings in a bigger piece of text at once
+
+INSTRUMENTATION_FILENAME = 'writer_stats.jsonl' # every session with instrumentation switched on appends one line to this file
+INSTRUMENTATION_MODES = ('off', 'light', 'full') # light: timings of callbacks & key bindings, stalls and saves; full: also every edit and the delay from key press to redraw
+STALL_PROBE_INTERVAL = 100 # ms between two checks, if the mainloop is still responsive
+STATISTICS_FILENAME = 'writer_statistics.db' # every session (and samples of your writing speed) end up in this sqlite database
+STATISTICS_SAMPLE_INTERVAL = 60 # seconds between two samples of your writing speed
+STATISTICS_DAYS_SHOWN = 14 # days listed in the Statistics tab
+STATISTICS_CRASHED_AFTER = 600 # seconds without a sign of life, after which an unfinished session counts as crashed (a running one updates lastSeen every STATISTICS_SAMPLE_INTERVAL)
+# sessions and samples are only ever appended; days holds the totals of every day, updated whenever a session ends, so the statistics never have to go through all sessions
+STATISTICS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, start REAL, day TEXT, file TEXT, blockStyle INTEGER, blockValue INTEGER, words INTEGER, seconds REAL, goalReached INTEGER, finished INTEGER, lastSeen REAL);
+CREATE TABLE IF NOT EXISTS samples (session INTEGER, seconds REAL, words INTEGER, wordsPerMinute REAL);
+CREATE INDEX IF NOT EXISTS samplesBySession ON samples (session);
+CREATE INDEX IF NOT EXISTS unfinishedSessions ON sessions (finished);
+CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY, sessions INTEGER, words INTEGER, seconds REAL, goals INTEGER);
+'''
+STALL_THRESHOLD = 0.2 # seconds a check may come late before it counts as a stall of the mainloop
+
+# a single edit of the text: kind is either 'insert' or 'delete', index is a tkinter index ('line.column') and text is the inserted or removed text
+TextDelta = namedtuple('TextDelta', ['kind', 'index', 'text'])
+
+def tkLength(text):
+    # the number of columns text takes up in a tk index; tk 8.6 counts chars outside the BMP (e.g. emoji) twice, python only once
+    if text.isascii():
+        return len(text)
+    return len(text) + len(ASTRAL_CHARS.findall(text))
+
+def advanceIndex(index, text):
+    # returns the index right behind text, if text was inserted at index; works without a widget
+    line, column = map(int, index.split('.'))
+    newlines = text.count('\n')
+    if newlines:
+        return f'{line + newlines}.{tkLength(text[text.rfind(chr(10)) + 1:])}'
+    return f'{line}.{column + tkLength(text)}'
+
+def countWords(text):
+    # a word is everything between whitespace (spaces, tabs and newlines alike)
+    return len(text.split())
+
+class WordCounter(): # keeps the number of words up to date by only looking at what was edited
+    def __init__(self) -> None:
+        self.count = 0
+
+    def reset(self, text=''):
+        self.count = countWords(text)
+
+    def inserted(self, left, text, right):
+        # left and right are the single chars around the edit; they decide, if the edit splits or joins words
+        self.count += countWords(left + text + right) - countWords(left + right)
+
+    def deleted(self, left, text, right):
+        self.count -= countWords(left + text + right) - countWords(left + right)
+
+class WordFrequencies(): # how often every word occurs; like WordCounter it's kept up to date by only looking at what was edited
+    def __init__(self, text='') -> None:
+        self.counts = {}
+        self.add(text, 1)
+
+    def add(self, text, amount):
+        for word in REPETITION_WORD.findall(text):
+            word = word.lower()
+            count = self.counts.get(word, 0) + amount
+            if count:
+                self.counts[word] = count
+            else:
+                del self.counts[word]
+
+    def inserted(self, left, text, right):
+        # left and right are the parts of the words touching the edit; the words they belong to are taken out and counted again with text in between
+        self.add(left + right, -1)
+        self.add(left + text + right, 1)
+
+    def deleted(self, left, text, right):
+        self.add(left + text + right, -1)
+        self.add(left + right, 1)
+
+    def mostCommon(self, number=REPETITION_TOP):
+        # (count, word) of the most frequent words worth showing
+        return heapq.nlargest(number, ((count, word) for word, count in self.counts.items() if isRepeatable(word)))
+
+def isRepeatable(word):
+    return len(word) >= REPETITION_MIN_LENGTH and word not in REPETITION_IGNORED
+
+def mergeDeltas(last, delta):
+    # merges two deltas into one, if delta continues last (e.g. typing or holding backspace); returns None otherwise
+    if last.kind != delta.kind:
+        return None
+
+    if delta.kind == 'insert':
+        if advanceIndex(last.index, last.text) == delta.index:
+            return TextDelta('insert', last.index, last.text + delta.text)
+    else:
+        if delta.index == last.index: # Delete key
+            return TextDelta('delete', last.index, last.text + delta.text)
+        if advanceIndex(delta.index, delta.text) == last.index: # BackSpace
+            return TextDelta('delete', delta.index, delta.text + last.text)
+    return None
+
+class RopeNode(): # a node of Document's tree; holds one piece of the text
+    __slots__ = ('text', 'newlines', 'left', 'right', 'priority', 'length', 'lines')
+
+    def __init__(self, text, priority=None) -> None:
+        self.text = text
+        self.newlines = text.count('\n') # newlines in this piece alone
+        self.left = None
+        self.right = None
+        self.priority = random.random() if priority is None else priority
+        self.length = len(text) # chars in the whole subtree
+        self.lines = self.newlines # newlines in the whole subtree
+
+    def update(self):
+        self.length = len(self.text)
+        self.lines = self.newlines
+        if self.left is not None:
+            self.length += self.left.length
+            self.lines += self.left.lines
+        if self.right is not None:
+            self.length += self.right.length
+            self.lines += self.right.lines
+
+class Document(): # the text as a rope (a randomly balanced tree of text pieces), so editing and looking up lines is O(log n) without needing a widget
+    def __init__(self, text='') -> None:
+        self.root = None
+        if text:
+            self.insert(0, text)
+
+    def __len__(self):
+        return self.root.length if self.root is not None else 0
+
+    def lineCount(self):
+        return (self.root.lines if self.root is not None else 0) + 1
+
+    # tree operations
+    @staticmethod
+    def _split(node, offset):
+        # splits the tree into the first offset chars and the rest
+        if node is None:
+            return (None, None)
+        leftLength = node.left.length if node.left is not None else 0
+        if offset <= leftLength:
+            left, node.left = Document._split(node.left, offset)
+            node.update()
+            return (left, node)
+        offset -= leftLength
+        if offset >= len(node.text):
+            node.right, right = Document._split(node.right, offset - len(node.text))
+            node.update()
+            return (node, right)
+
+        # the split happens inside this node's piece; both halves keep its priority, so the tree stays balanced
+        left = RopeNode(node.text[:offset], node.priority)
+        left.left = node.left
+        left.update()
+        right = RopeNode(node.text[offset:], node.priority)
+        right.right = node.right
+        right.update()
+        return (left, right)
+
+    @staticmethod
+    def _merge(left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = Document._merge(left.right, right)
+            left.update()
+            return left
+        right.left = Document._merge(left, right.left)
+        right.update()
+        return right
+
+    def _path(self, offset):
+        # the nodes from the root down to the node containing offset and offset within that node's piece
+        path = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            leftLength = node.left.length if node.left is not None else 0
+            if offset < leftLength or (offset == leftLength and leftLength > 0):
+                node = node.left
+            elif offset <= leftLength + len(node.text):
+                return (path, offset - leftLength)
+            else:
+                offset -= leftLength + len(node.text)
+                node = node.right
+        return (path, None)
+
+    @staticmethod
+    def _updatePath(path):
+        for node in reversed(path):
+            node.update()
+
+    # editing
+    def insert(self, offset, text):
+        if not text:
+            return
+        offset = max(0, min(offset, len(self)))
+
+        # small inserts (i.e. typing) go right into an existing piece, so typing doesn't create a node per keystroke
+        if len(text) < DOCUMENT_CHUNK_SIZE and self.root is not None:
+            path, position = self._path(offset)
+            node = path[-1]
+            if position is not None and len(node.text) + len(text) <= 2 * DOCUMENT_CHUNK_SIZE:
+                node.text = node.text[:position] + text + node.text[position:]
+                node.newlines += text.count('\n')
+                self._updatePath(path)
+                return
+
+        middle = None
+        for start in range(0, len(text), DOCUMENT_CHUNK_SIZE):
+            middle = self._merge(middle, RopeNode(text[start:start + DOCUMENT_CHUNK_SIZE]))
+        left, right = self._split(self.root, offset)
+        self.root = self._merge(self._merge(left, middle), right)
+
+    def delete(self, offset, length):
+        offset = max(0, min(offset, len(self)))
+        length = max(0, min(length, len(self) - offset))
+        if not length:
+            return
+
+        # small deletes inside a single piece just shorten it
+        path, position = self._path(offset)
+        node = path[-1] if path else None
+        if position is not None and position + length <= len(node.text) and len(node.text) > length:
+            node.newlines -= node.text.count('\n', position, position + length)
+            node.text = node.text[:position] + node.text[position + length:]
+            self._updatePath(path)
+            return
+
+        left, rest = self._split(self.root, offset)
+        _, right = self._split(rest, length)
+        self.root = self._merge(left, right)
+
+    def apply(self, delta):
+        # applies a TextDelta (which uses tkinter indices)
+        if delta.kind == 'insert':
+            self.insert(self.offset(delta.index), delta.text)
+        else:
+            self.delete(self.offset(delta.index), len(delta.text))
+
+    # reading
+    def pieces(self, start=0, end=None):
+        # the pieces of text between start and end in order; joining them is up to the caller (e.g. on another thread)
+        end = len(self) if end is None else min(end, len(self))
+        pieces = []
+        stack = []
+        node = self.root
+        nodeStart = 0 # offset of the leftmost char of node's subtree
+        while stack or node is not None:
+            if node is not None:
+                if nodeStart >= end:
+                    node = None
+                    continue
+                if nodeStart + node.length <= start: # the whole subtree lies before start
+                    node = None
+                    continue
+                stack.append((node, nodeStart))
+                node = node.left
+                continue
+            node, nodeStart = stack.pop()
+            textStart = nodeStart + (node.left.length if node.left is not None else 0)
+            if textStart < end and textStart + len(node.text) > start:
+                pieces.append(node.text[max(0, start - textStart):end - textStart])
+            nodeStart = textStart + len(node.text)
+            node = node.right
+        return pieces
+
+    def text(self):
+        return ''.join(self.pieces())
+
+    def slice(self, start, end):
+        if start >= end:
+            return ''
+        return ''.join(self.pieces(max(0, start), end))
+
+    def lineStart(self, line):
+        # the offset of the first char of line (1-based, like tkinter)
+        newlines = line - 1 # the number of newlines in front of line
+        if newlines <= 0:
+            return 0
+        if newlines > (self.root.lines if self.root is not None else 0):
+            return len(self)
+        node = self.root
+        offset = 0
+        while node is not None:
+            leftLines = node.left.lines if node.left is not None else 0
+            if newlines <= leftLines:
+                node = node.left
+                continue
+            newlines -= leftLines
+            offset += node.left.length if node.left is not None else 0
+            if newlines <= node.newlines:
+                position = -1
+                for _ in range(newlines):
+                    position = node.text.index('\n', position + 1)
+                return offset + position + 1
+            newlines -= node.newlines
+            offset += len(node.text)
+            node = node.right
+        return len(self)
+
+    def lineOf(self, offset):
+        # the (1-based) line the char at offset is in
+        offset = max(0, min(offset, len(self)))
+        node = self.root
+        newlines = 0
+        while node is not None:
+            leftLength = node.left.length if node.left is not None else 0
+            if offset < leftLength:
+                node = node.left
+                continue
+            newlines += node.left.lines if node.left is not None else 0
+            offset -= leftLength
+            if offset <= len(node.text):
+                return newlines + node.text.count('\n', 0, offset) + 1
+            newlines += node.newlines
+            offset -= len(node.text)
+            node = node.right
+        return newlines + 1
+
+    def offset(self, index):
+        # converts a tkinter index ('line.column') into an offset; the column is tk's (see tkLength)
+        line, column = map(int, str(index).split('.'))
+        start = self.lineStart(line)
+        end = min(start + column, self.lineEnd(start))
+        prefix = self.slice(start, end)
+        if prefix.isascii():
+            return end
+        columns = 0
+        for position, char in enumerate(prefix):
+            if columns >= column:
+                return start + position
+            columns += 2 if char > '\uffff' else 1
+        return end
+
+    def lineEnd(self, start):
+        # the offset of the newline ending the line that starts at start (or the end of the text)
+        if start >= len(self):
+            return len(self)
+        nextLine = self.lineStart(self.lineOf(start) + 1)
+        return nextLine - 1 if nextLine > start and self.slice(nextLine - 1, nextLine) == '\n' else len(self)
+
+    def index(self, offset):
+        # converts an offset into a tkinter index ('line.column')
+        line = self.lineOf(offset)
+        start = self.lineStart(line)
+        return f'{line}.{tkLength(self.slice(start, max(start, min(offset, len(self)))))}'
+
+    def charAt(self, offset):
+        return self.slice(offset, offset + 1)
+
+class UndoGroup(): # one undo step: the deltas undone/redone together and where the cursor & selection were before them
+    def __init__(self, delta, cursor=None, selection=()) -> None:
+        self.deltas = [delta]
+        self.cursor = cursor
+        self.selection = selection
+
+class UndoJournal(): # an undo history that only stores what changed, not the whole text
+    def __init__(self, memoryLimit=UNDO_MEMORY_LIMIT) -> None:
+        self.memoryLimit = memoryLimit
+        self.groups = [] # every group holds the deltas that are undone/redone together (e.g. a typed word)
+        self.steps = 0 # number of groups currently applied, everything behind it can be redone
+        self.size = 0 # approximated memory used by all groups
+        self.groupOpen = False # whether the next delta may be merged into the last group
+        self.compoundDepth = 0 # while > 0 every delta is put into the same group
+
+    def clear(self):
+        self.groups = []
+        self.steps = 0
+        self.size = 0
+        self.groupOpen = False
+
+    def closeGroup(self):
+        # the next edit starts a new undo step
+        if self.compoundDepth == 0:
+            self.groupOpen = False
+
+    def beginCompound(self):
+        # everything until endCompound is undone in one step
+        if self.compoundDepth == 0:
+            self.groupOpen = False
+        self.compoundDepth += 1
+
+    def endCompound(self):
+        self.compoundDepth = max(0, self.compoundDepth - 1)
+        if self.compoundDepth == 0:
+            self.groupOpen = False
+
+    def record(self, delta, cursor=None, selection=()):
+        # cursor and selection describe the state before delta and are only kept, if delta starts a new group
+        if not delta.text:
+            return
+
+        # a new edit makes everything that could have been redone unreachable
+        if self.steps < len(self.groups):
+            for group in self.groups[self.steps:]:
+                self.size -= self.groupSize(group)
+            del self.groups[self.steps:]
+            self.groupOpen = False
+
+        if self.groupOpen and self.groups:
+            deltas = self.groups[-1].deltas
+            merged = self.merge(deltas[-1], delta)
+            if merged is not None:
+                deltas[-1] = merged
+                self.size += len(delta.text)
+                return self.trim()
+            if self.compoundDepth or self.continuesGroup(deltas[-1], delta):
+                deltas.append(delta)
+                self.size += len(delta.text) + UNDO_DELTA_OVERHEAD
+                return self.trim()
+
+        self.groups.append(UndoGroup(delta, cursor, selection))
+        self.steps = len(self.groups)
+        self.size += len(delta.text) + UNDO_DELTA_OVERHEAD
+        self.groupOpen = True
+        self.trim()
+
+    def merge(self, last, delta):
+        # a typed word ends with the whitespace after it, so undo works word by word
+        if delta.kind == 'insert' and last.kind == 'insert' and not self.compoundDepth and last.text[-1].isspace() and not delta.text[0].isspace():
+            return None
+        return mergeDeltas(last, delta)
+
+    def continuesGroup(self, last, delta):
+        # typing over a selection first deletes the selection and then inserts at the same position
+        return last.kind == 'delete' and delta.kind == 'insert' and last.index == delta.index
+
+    def groupSize(self, group):
+        return sum(len(delta.text) + UNDO_DELTA_OVERHEAD for delta in group.deltas)
+
+    def trim(self):
+        # drops the oldest steps until the history fits into memoryLimit again (the newest step is always kept)
+        while self.size > self.memoryLimit and len(self.groups) > 1 and self.steps > 1:
+            self.size -= self.groupSize(self.groups.pop(0))
+            self.steps -= 1
+
+    def undo(self):
+        # returns the group to revert or None, if there is nothing left to undo
+        if self.steps == 0:
+            return None
+        self.steps -= 1
+        self.groupOpen = False
+        return self.groups[self.steps]
+
+    def redo(self):
+        # returns the group to reapply or None, if there is nothing left to redo
+        if self.steps >= len(self.groups):
+            return None
+        self.steps += 1
+        self.groupOpen = False
+        return self.groups[self.steps - 1]
+
+class PeriodicTask(): # a task of the TickScheduler
+    def __init__(self, callback, interval, idleInterval=None) -> None:
+        self.callback = callback # called with the number of ticks that were due (more than 1, if the mainloop was blocked for a while)
+        self.interval = interval # seconds
+        self.idleInterval = idleInterval or interval # seconds, while the user is idle
+        self.due = 0.0
+
+class TickScheduler(): # runs all periodic tasks of a window from a single tk timer, timed by time.monotonic() instead of by counting callbacks
+    def __init__(self, widget, wrap=None) -> None:
+        self.widget = widget
+        self.wrap = wrap # e.g. Instrumentation.wrap, to measure every task
+        self.tasks = []
+        self.timer = None
+        self.timerDue = None
+        self.lastActivity = time.monotonic()
+        self.idle = False
+
+    def add(self, callback, interval, idleInterval=None):
+        if self.wrap is not None:
+            callback = self.wrap(callback.__name__, callback)
+        task = PeriodicTask(callback, interval, idleInterval)
+        task.due = time.monotonic() + interval
+        self.tasks.append(task)
+        return task
+
+    def start(self):
+        self._schedule()
+
+    def stop(self):
+        if self.timer is not None:
+            self.widget.after_cancel(self.timer)
+            self.timer = None
+
+    def activity(self, *args):
+        # called whenever you edit something (takes any arguments, so it can be an edit listener)
+        self.lastActivity = time.monotonic()
+        if self.idle:
+            # you're back: the tasks return to their normal interval right away instead of after their next (long) idle wait
+            self.idle = False
+            for task in self.tasks:
+                task.due = min(task.due, self.lastActivity + task.interval)
+            self._schedule()
+
+    def _schedule(self):
+        if not self.tasks:
+            return
+        due = min(task.due for task in self.tasks)
+        if self.timer is not None:
+            if self.timerDue is not None and self.timerDue <= due:
+                return
+            self.widget.after_cancel(self.timer)
+        self.timerDue = due
+        self.timer = self.widget.after(max(1, int((due - time.monotonic()) * 1000) + 1), self._tick)
+
+    def _tick(self):
+        self.timer = None
+        now = time.monotonic()
+        self.idle = now - self.lastActivity > IDLE_AFTER
+        for task in self.tasks:
+            if now < task.due:
+                continue
+            interval = task.idleInterval if self.idle else task.interval
+            missed = int((now - task.due) // interval) + 1 # the ticks that were due, but couldn't run as the mainloop was busy
+            task.due += missed * interval # stays on its own beat instead of drifting by the delay
+            task.callback(missed)
+        self._schedule()
+
+class Instrumentation(): # optional timing statistics of the event handlers, to find out what makes a session sluggish
+    def __init__(self, mode='off') -> None:
+        self.mode = mode if mode in INSTRUMENTATION_MODES else 'off'
+        self.enabled = self.mode != 'off'
+        self.detailed = self.mode == 'full'
+        self.startTime = time.perf_counter()
+        self.histograms = {} # name -> [count, total seconds, max seconds, counts per bucket]; bucket i holds durations below 2^i microseconds
+        self.stalls = [] # (seconds since start, seconds the mainloop didn't respond)
+        self.saves = [] # (seconds since start, seconds the save took, error or None)
+        self.probe = None # the after id of the next stall check
+
+    def record(self, name, duration):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = [0, 0.0, 0.0, [0] * 32]
+        histogram[0] += 1
+        histogram[1] += duration
+        if duration > histogram[2]:
+            histogram[2] = duration
+        histogram[3][min(31, int(duration * 1e6).bit_length())] += 1
+
+    def wrap(self, name, function):
+        # returns function, measuring every call of it, if instrumentation is switched on
+        if not self.enabled:
+            return function
+
+        def measured(*args):
+            startTime = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.record(name, time.perf_counter() - startTime)
+        return measured
+
+    def recordSave(self, duration, exception=None):
+        if self.enabled:
+            self.record('save (saver thread)', duration)
+            self.saves.append((time.perf_counter() - self.startTime, duration, None if exception is None else str(exception)))
+
+    def startStallProbe(self, widget):
+        # checks every STALL_PROBE_INTERVAL ms whether the mainloop got to run the check in time; if it didn't, something blocked it
+        if self.enabled:
+            self._probe(widget, time.perf_counter() + STALL_PROBE_INTERVAL / 1000)
+
+    def _probe(self, widget, expected):
+        now = time.perf_counter()
+        if now - expected > STALL_THRESHOLD:
+            self.stalls.append((expected - self.startTime, now - expected))
+        self.probe = widget.after(STALL_PROBE_INTERVAL, self._probe, widget, now + STALL_PROBE_INTERVAL / 1000)
+
+    def stopStallProbe(self, widget):
+        # the probe would keep running (and recording) after the writer is closed, if another mainloop (the configurator's) is still running
+        if self.probe is not None:
+            widget.after_cancel(self.probe)
+            self.probe = None
+
+    def startKeyProbe(self, text):
+        # measures from a key press until tk has redrawn the text (full mode only)
+        # one bindtag in front of the widget's notes the time of the key press; one behind the Text class (which does the typing)
+        # queues an idle callback, which runs after the redraw the key caused, as tk handles idle callbacks in order
+        if not self.detailed:
+            return
+        tags = text.bindtags()
+        text.bindtags(('InstrumentationKeyStart',) + tags[:2] + ('InstrumentationKeyProbe',) + tags[2:])
+
+        def keyPressed(event):
+            self.keyTime = time.perf_counter()
+
+        def keyHandled(event):
+            keyTime = self.keyTime
+            text.after_idle(lambda: self.record('key press -> redraw', time.perf_counter() - keyTime))
+
+        self.keyTime = time.perf_counter()
+        text.bind_class('InstrumentationKeyStart', '<Key>', keyPressed)
+        text.bind_class('InstrumentationKeyProbe', '<Key>', keyHandled)
+
+    def summary(self):
+        histograms = {}
+        for name, (count, total, maximum, buckets) in sorted(self.histograms.items()):
+            histograms[name] = {
+                'count': count,
+                'meanMilliseconds': total / count * 1000,
+                'maxMilliseconds': maximum * 1000,
+                'buckets': {f'<{2 ** i}us': amount for i, amount in enumerate(buckets) if amount},
+            }
+        return {
+            'mode': self.mode,
+            'seconds': time.perf_counter() - self.startTime,
+            'handlers': histograms,
+            'stalls': [{'at': at, 'seconds': seconds} for at, seconds in self.stalls],
+            'saves': [{'at': at, 'seconds': seconds, 'error': error} for at, seconds, error in self.saves],
+        }
+
+    def dump(self, fileLocation, location=INSTRUMENTATION_FILENAME):
+        # appends the statistics of this session to location (one json object per line)
+        if not self.enabled:
+            return
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'file': fileLocation}
+        entry.update(self.summary())
+        try:
+            with open(location, 'a', encoding=ENCODING) as file:
+                file.write(json.dumps(entry) + '\n')
+        except OSError as exception:
+            print(f'Could not write the statistics to "{location}": {exception}')
+
+class SessionStatistics(): # remembers every writing session, so you can see how much (and how fast) you wrote over the days
+    def __init__(self, location=STATISTICS_FILENAME) -> None:
+        import sqlite3 # only needed once a session starts or the statistics are shown
+        self.connection = sqlite3.connect(location)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL') # losing the last sample in a power cut doesn't matter, waiting for the disk every minute would
+        self.connection.executescript(STATISTICS_SCHEMA)
+        if 'lastSeen' not in [column[1] for column in self.connection.execute('PRAGMA table_info(sessions)')]:
+            with self.connection: # written by an older version
+                self.connection.execute('ALTER TABLE sessions ADD COLUMN lastSeen REAL')
+        self.session = None
+        self.finishCrashedSessions()
+
+    def finishCrashedSessions(self):
+        # sessions that never finished (the program crashed) count with their last sample
+        # an unfinished session might just as well still be running (in another window, or the writer the Statistics tab was opened from), so only the ones silent for long enough count
+        with self.connection:
+            for (session,) in self.connection.execute('SELECT id FROM sessions WHERE finished = 0 AND COALESCE(lastSeen, start) < ?', (time.time() - STATISTICS_CRASHED_AFTER,)).fetchall():
+                self.finish(session)
+
+    def startSession(self, fileLocation, blockStyle, blockValue):
+        start = time.time()
+        with self.connection:
+            cursor = self.connection.execute('INSERT INTO sessions VALUES (NULL, ?, ?, ?, ?, ?, 0, 0, 0, 0, ?)',
+                                             (start, time.strftime('%Y-%m-%d', time.localtime(start)), fileLocation, blockStyle, blockValue, start))
+        self.session = cursor.lastrowid
+
+    def sample(self, seconds, words, wordsPerMinute):
+        # the session itself is updated as well, so a crash doesn't lose more than one sample
+        with self.connection:
+            self.connection.execute('INSERT INTO samples VALUES (?, ?, ?, ?)', (self.session, seconds, words, wordsPerMinute))
+            self.connection.execute('UPDATE sessions SET seconds = ?, words = ?, lastSeen = ? WHERE id = ?', (seconds, words, time.time(), self.session))
+
+    def alive(self):
+        # keeps the session from counting as crashed while there's nothing to sample (e.g. while the file is loading)
+        with self.connection:
+            self.connection.execute('UPDATE sessions SET lastSeen = ? WHERE id = ?', (time.time(), self.session))
+
+    def finishSession(self, seconds, words, goalReached):
+        with self.connection:
+            self.connection.execute('UPDATE sessions SET seconds = ?, words = ?, goalReached = ? WHERE id = ?', (seconds, words, int(goalReached), self.session))
+            self.finish(self.session)
+        self.session = None
+
+    def finish(self, session):
+        # adds the session to the totals of its day (only once, even if another window finished it already)
+        if self.connection.execute('UPDATE sessions SET finished = 1 WHERE id = ? AND finished = 0', (session,)).rowcount == 0:
+            return
+        day, words, seconds, goalReached = self.connection.execute('SELECT day, words, seconds, goalReached FROM sessions WHERE id = ?', (session,)).fetchone()
+        self.connection.execute('INSERT OR IGNORE INTO days VALUES (?, 0, 0, 0, 0)', (day,))
+        self.connection.execute('UPDATE days SET sessions = sessions + 1, words = words + ?, seconds = seconds + ?, goals = goals + ? WHERE day = ?', (words, seconds, goalReached, day))
+
+    def summary(self, days=STATISTICS_DAYS_SHOWN):
+        import datetime
+
+        sessions, words, seconds, goals = self.connection.execute('SELECT SUM(sessions), SUM(words), SUM(seconds), SUM(goals) FROM days').fetchone()
+        recent = self.connection.execute('SELECT day, words, seconds FROM days ORDER BY day DESC LIMIT ?', (days,)).fetchall()
+
+        # streaks: days in a row you wrote on; the current one may end yesterday, as you might not have written yet today
+        longestStreak = streak = 0
+        previous = None
+        for (day,) in self.connection.execute('SELECT day FROM days ORDER BY day'):
+            day = datetime.date.fromisoformat(day)
+            streak = streak + 1 if previous is not None and (day - previous).days == 1 else 1
+            longestStreak = max(longestStreak, streak)
+            previous = day
+        if previous is None or (datetime.date.today() - previous).days > 1:
+            streak = 0
+
+        return {
+            'sessions': sessions or 0,
+            'words': words or 0,
+            'seconds': seconds or 0,
+            'goals': goals or 0,
+            'wordsPerMinute': (words or 0) / (seconds / 60) if seconds else 0,
+            'currentStreak': streak,
+            'longestStreak': longestStreak,
+            'recent': recent, # (day, words, seconds), newest first
+            }
+
+    def close(self):
+        self.connection.close()
+
+class EditJournal(): # an append-only file next to the document, recording every edit since the last save, so a crash can't cost more than a second of writing
+    def __init__(self, fileLocation) -> None:
+        self.location = fileLocation + JOURNAL_SUFFIX
+        self.file = None # only opened once there is something to write
+        self.pending = None # the delta that is still being coalesced (e.g. the word you are typing)
+        generations = self.generations(fileLocation)
+        self.generation = generations[-1] if generations else 0 # the journal is renamed to location.<generation> when the text is saved
+
+    @staticmethod
+    def generations(fileLocation):
+        # the numbers of all journals that were handed over to a save, but not removed yet (i.e. the save hasn't finished or the program crashed)
+        directory = os.path.dirname(os.path.abspath(fileLocation))
+        prefix = os.path.basename(fileLocation) + JOURNAL_SUFFIX + '.'
+        numbers = []
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                numbers.append(int(name[len(prefix):]))
+        return sorted(numbers)
+
+    @staticmethod
+    def readDeltas(fileLocation):
+        # every delta of a crashed session, oldest first; an unfinished last line (the crash happened while writing it) is ignored
+        locations = [f'{fileLocation}{JOURNAL_SUFFIX}.{number}' for number in EditJournal.generations(fileLocation)]
+        locations.append(fileLocation + JOURNAL_SUFFIX)
+        deltas = []
+        for location in locations:
+            if not os.path.exists(location):
+                continue
+            with open(location, 'r', encoding=ENCODING) as file:
+                for line in file:
+                    try:
+                        kind, index, text = json.loads(line)
+                    except ValueError:
+                        break
+                    deltas.append(TextDelta('insert' if kind == 'i' else 'delete', index, text))
+        return deltas
+
+    def record(self, delta):
+        if self.pending is not None:
+            merged = mergeDeltas(self.pending, delta)
+            if merged is not None:
+                self.pending = merged
+                return
+            self.write(self.pending)
+        self.pending = delta
+
+    def write(self, delta):
+        if self.file is None:
+            self.file = open(self.location, 'a', encoding=ENCODING, buffering=64 * 1024)
+        self.file.write(json.dumps([delta.kind[0], delta.index, delta.text]) + '\n')
+
+    def flush(self):
+        # hands the buffered edits to the os; that's enough to survive the program crashing (fsync every second would be too expensive on slow disks)
+        if self.pending is not None:
+            self.write(self.pending)
+            self.pending = None
+        if self.file is not None:
+            self.file.flush()
+
+    def rotate(self):
+        # called when a snapshot for saving is taken: the edits so far are covered by that snapshot, so they move into their own generation
+        # returns the generation that can be removed once the snapshot is written (see removeGenerations)
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.location):
+            self.generation += 1
+            os.replace(self.location, f'{self.location}.{self.generation}')
+        return self.generation
+
+    def removeGenerations(self, generation):
+        # removes every journal up to generation, as their edits are in the saved file now (called on the saver's thread right after the file is replaced)
+        for number in self.generations(self.location[:-len(JOURNAL_SUFFIX)]):
+            if number <= generation:
+                try:
+                    os.remove(f'{self.location}.{number}')
+                except OSError:
+                    pass
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.location) and os.path.getsize(self.location) == 0:
+            os.remove(self.location)
+
+def chunkText(text):
+    # splits text into chunks of paragraphs; whether a paragraph ends a chunk only depends on the paragraph itself
+    # so an edit only changes the chunk it is in, and all other chunks stay the same from version to version
+    chunks = []
+    start = position = 0
+    while position < len(text):
+        end = text.find('\n\n', position)
+        end = min(len(text) if end == -1 else end + 2, start + HISTORY_CHUNK_MAX)
+        boundary = end - start >= HISTORY_CHUNK_MAX or (end - start >= HISTORY_CHUNK_MIN and zlib.crc32(text[position:end].encode(ENCODING, 'surrogatepass')) % HISTORY_CHUNK_SPREAD == 0)
+        position = end
+        if boundary or position == len(text):
+            chunks.append(text[start:end])
+            start = end
+    return chunks
+
+def chunkHash(chunk):
+    return hashlib.sha1(chunk.encode(ENCODING, 'surrogatepass')).hexdigest()
+
+class VersionHistory(): # every saved version of a document; each chunk of text is only stored once, so the history grows with what you edit, not with the length of the text
+    def __init__(self, fileLocation) -> None:
+        self.directory = fileLocation + HISTORY_SUFFIX
+        self.packLocation = os.path.join(self.directory, 'chunks.pack') # the compressed chunks, one after the other
+        self.indexLocation = os.path.join(self.directory, 'chunks.idx') # "digest offset length" of every chunk in the pack
+        self.versionsLocation = os.path.join(self.directory, 'versions.jsonl')
+        self.lock = threading.Lock() # versions are added on the saver's thread
+        self.index = None # chunk digest -> (offset, length); only read once it is needed, so opening a file stays fast
+        self.versions = []
+
+    def load(self):
+        if self.index is not None:
+            return
+        self.index = {}
+        if os.path.exists(self.indexLocation):
+            with open(self.indexLocation, 'r', encoding=ENCODING) as file:
+                for line in file:
+                    try:
+                        digest, offset, length = line.split()
+                        self.index[digest] = (int(offset), int(length))
+                    except ValueError:
+                        break # the last line might not have been written completely
+        if os.path.exists(self.versionsLocation):
+            with open(self.versionsLocation, 'r', encoding=ENCODING) as file:
+                for line in file:
+                    try:
+                        self.versions.append(json.loads(line))
+                    except ValueError:
+                        break
+
+    def addVersion(self, text, words):
+        # stores text as a new version (unless it is the same as the last one); returns whether it was stored
+        with self.lock:
+            self.load()
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.packLocation, 'ab') as pack, open(self.indexLocation, 'a', encoding=ENCODING) as index:
+                hashes = [self.store(chunk, pack, index) for chunk in chunkText(text)]
+
+                # the list of hashes (the recipe) is chunked as well, so a long text doesn't need a long list for every version
+                recipe, group = [], []
+                for digest in hashes:
+                    group.append(digest)
+                    if int(digest[:8], 16) % HISTORY_RECIPE_SPREAD == 0:
+                        recipe.append(self.store('\n'.join(group), pack, index))
+                        group = []
+                if group:
+                    recipe.append(self.store('\n'.join(group), pack, index))
+
+                if self.versions and self.versions[-1]['recipe'] == recipe:
+                    return False
+                for file in (pack, index):
+                    file.flush()
+                    os.fsync(file.fileno()) # the chunks have to be on the disk before a version refers to them
+
+            version = {'time': time.time(), 'words': words, 'recipe': recipe}
+            with open(self.versionsLocation, 'a', encoding=ENCODING) as file:
+                file.write(json.dumps(version) + '\n')
+            self.versions.append(version)
+            return True
+
+    def store(self, chunk, pack, index):
+        digest = chunkHash(chunk)
+        if digest not in self.index:
+            data = zlib.compress(chunk.encode(ENCODING, 'surrogatepass'))
+            offset = pack.tell()
+            pack.write(data)
+            index.write(f'{digest} {offset} {len(data)}\n')
+            self.index[digest] = (offset, len(data))
+        return digest
+
+    def read(self, digest, pack):
+        offset, length = self.index[digest]
+        pack.seek(offset)
+        return zlib.decompress(pack.read(length)).decode(ENCODING, 'surrogatepass')
+
+    def allVersions(self):
+        # (time, words) of every version, oldest first
+        with self.lock:
+            self.load()
+            return [(version['time'], version['words']) for version in self.versions]
+
+    def chunks(self, number):
+        # the chunks of a version as (digest, text)
+        with self.lock, open(self.packLocation, 'rb') as pack:
+            self.load()
+            hashes = [digest for piece in self.versions[number]['recipe'] for digest in self.read(piece, pack).split('\n')]
+            return [(digest, self.read(digest, pack)) for digest in hashes]
+
+    def text(self, number):
+        return ''.join(text for digest, text in self.chunks(number))
+
+    def diff(self, number, text):
+        # the lines that differ between a version and text; only the chunks that changed are compared line by line
+        # returns (kind, line) with kind being '@' (where the change is in text), '-' (removed), '+' (added) or ' ' (unchanged)
+        import difflib # only needed when versions are compared
+
+        old = self.chunks(number)
+        new = [(chunkHash(chunk), chunk) for chunk in chunkText(text)]
+        lines = []
+        lineNumber = 1
+        chunkMatcher = difflib.SequenceMatcher(None, [digest for digest, chunk in old], [digest for digest, chunk in new], autojunk=False)
+        for tag, i1, i2, j1, j2 in chunkMatcher.get_opcodes():
+            newText = ''.join(chunk for digest, chunk in new[j1:j2])
+            if tag != 'equal':
+                oldLines, newLines = ''.join(chunk for digest, chunk in old[i1:i2]).splitlines(), newText.splitlines()
+                lines.append(('@', f'line {lineNumber}'))
+                for lineTag, a1, a2, b1, b2 in difflib.SequenceMatcher(None, oldLines, newLines, autojunk=False).get_opcodes():
+                    if lineTag == 'equal':
+                        lines += [(' ', line) for line in oldLines[a1:a2]]
+                    else:
+                        lines += [('-', line) for line in oldLines[a1:a2]] + [('+', line) for line in newLines[b1:b2]]
+            lineNumber += newText.count('\n')
+        return lines
 
 class BetterText(tk.Text):
-    def __init__(self, parent, *args, **kwargs):
+    def __init__(self, parent, *args, undoMemoryLimit=UNDO_MEMORY_LIMIT, instrumentation=None, virtual=False, **kwargs):
         tk.Text.__init__(self, parent, *args, **kwargs)
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation() # measures every bound handler, if switched on (see bind)
+
+        # every insert and delete (typed or done by code) runs through _dispatch, so edits can be recorded as deltas
+        # a small tcl proc takes the widget's name and only hands those to python; everything else goes straight to the real widget (errors included, tk's own bindings rely on them)
+        self._tkCommand = self._w + '_orig'
+        self._editCommand = self._w + '_edit'
+        self.tk.call('rename', self._w, self._tkCommand)
+        self.tk.createcommand(self._editCommand, self._dispatch)
+        self.tk.call('proc', self._w, 'command args', f'''
+            if {{$command in {{insert delete replace}}}} {{
+                return [{self._editCommand} $command {{*}}$args]
+            }}
+            return [uplevel 1 [list {self._tkCommand} $command {{*}}$args]]''')
+        self.recording = True # set to False while edits shouldn't end up in the undo history (e.g. while loading a file)
+
+        self.wordCounter = WordCounter() # updated on every edit, so the word count never has to be recounted
+        self.wordFrequencies = None # a WordFrequencies, updated on every edit as well, while repetitions are highlighted (see Writer.toggleRepetitions)
+        self.editListeners = [] # functions called with the delta of every edit (undo/redo and loading included); see add_changes
+        self.pendingDeltas = [] # edits not yet handed to editListeners; a burst of typing is handed over as one delta, once tk is idle
+        self.editCount = 0 # goes up with every edit, so others can tell cheaply whether the text changed
+        self.flushScheduled = None
+        self.document = Document() # a copy of the text that is kept in sync with every edit; saving, counting and undo read from it instead of the widget
+
+        self.viewListeners = [] # functions called whenever the visible part of the text changes (scrolling, resizing, editing)
+        self.configure(yscrollcommand=self._viewChanged)
+
+        # virtual editing: the widget only holds the lines of the document around the view, the rest is swapped in while scrolling (see setWindow)
+        # deltas, the undo history and the document always use the line numbers of the whole text; only the widget is offset by lineOffset
+        self.virtual = virtual
+        self.lineOffset = 0 # document lines in front of the first line of the widget
+        self.windowListeners = [] # functions called after other lines were swapped in
+        self.windowMoveScheduled = None
+        if virtual:
+            self.bind('<Control-Home>', self.goToStart)
+            self.bind('<Control-End>', self.goToEnd)
 
         # Undo/Redo
-        self.changes = [''] # changes saves a copy of every altered version of your document
-        self.steps = int() # steps saves the current step in undo time
+        self.undoJournal = UndoJournal(undoMemoryLimit) # only saves the deltas of every edit, grouped into undo steps
         # binding the apropriate Controls to undo and redo
         self.bind('<Control-z>', self.undo)
         self.bind('<Control-y>', self.redo)
-        self.bind('<Key>', self.add_changes) # every time a button is pressed, i.e. the text is altered, a new copy of text is saved in changes
+        # there is no <Key> binding: edits are recorded in _dispatch, whenever the text really changes, so moving the cursor (or pressing shift) costs nothing
+        # (an edit somewhere else than the last one starts a new undo step by itself, see UndoJournal.record)
 
 
         # Markdown shortcuts
@@ -34,45 +1084,423 @@ class BetterText(tk.Text):
         self.bind('<Control-BackSpace>', self.wordRemovalLeft)
         self.bind('<Control-Delete>', self.wordRemovalRight)
 
+    def _viewChanged(self, first, last):
+        for listener in self.viewListeners:
+            listener()
+        if self.virtual and self.windowMoveScheduled is None:
+            top, bottom, windowLines = self._visibleLines()
+            if (self.lineOffset > 0 and top <= VIRTUAL_MARGIN_LINES) or (self.lineOffset + windowLines < self.document.lineCount() and bottom > windowLines - VIRTUAL_MARGIN_LINES):
+                self.windowMoveScheduled = self.after_idle(self._recenterWindow) # not right away, tk is still busy scrolling
+
+    # Virtual Editing
+    def _visibleLines(self):
+        # the first and last visible line and the number of lines in the widget
+        top = int(self._call('index', '@0,0').split('.')[0])
+        bottom = int(self._call('index', f'@0,{self.winfo_height()}').split('.')[0])
+        return (top, bottom, int(self._call('index', 'end - 1 chars').split('.')[0]))
+
+    def _recenterWindow(self):
+        self.windowMoveScheduled = None
+        top, bottom, windowLines = self._visibleLines()
+        self.setWindow(self.lineOffset + top - (VIRTUAL_WINDOW_LINES - (bottom - top)) // 2)
+
+    def documentIndex(self, index):
+        # the index in the document of an index of the widget
+        line, column = str(index).split('.')
+        return f'{int(line) + self.lineOffset}.{column}' if self.lineOffset else f'{line}.{column}'
+
+    def widgetIndex(self, index):
+        # the index in the widget of an index of the document (None, if that line isn't in the widget right now)
+        line, column = str(index).split('.')
+        line = int(line) - self.lineOffset
+        if line < 1 or line > int(self._call('index', 'end - 1 chars').split('.')[0]):
+            return None
+        return f'{line}.{column}'
+
+    def showIndex(self, index):
+        # like widgetIndex, but the lines around index are swapped in first, if they aren't in the widget
+        widgetIndex = self.widgetIndex(index)
+        if widgetIndex is None and self.virtual:
+            self.setWindow(int(index.split('.')[0]) - VIRTUAL_WINDOW_LINES // 2)
+            widgetIndex = self.widgetIndex(index)
+        return widgetIndex
+
+    def _clampedIndex(self, index):
+        # the widget index of a document index, or the start/end of the widget, if it is in front of/behind it
+        widgetIndex = self.widgetIndex(index)
+        if widgetIndex is not None:
+            return widgetIndex
+        return '1.0' if int(index.split('.')[0]) <= self.lineOffset else str(self._call('index', 'end - 1 chars'))
+
+    def setWindow(self, firstLine):
+        # puts VIRTUAL_WINDOW_LINES lines of the document, starting at firstLine, into the widget; only tk has to be told, the document stays as it is
+        lineCount = self.document.lineCount()
+        firstLine = max(1, min(firstLine, lineCount - VIRTUAL_WINDOW_LINES + 1))
+        lastLine = min(lineCount, firstLine + VIRTUAL_WINDOW_LINES - 1)
+
+        # the cursor, the selection and the view stay where they are in the document (as far as they are in the new window)
+        cursor = self.documentIndex(self._call('index', 'insert'))
+        selection = [self.documentIndex(index) for index in self._call('tag', 'ranges', 'sel')]
+        top = self.documentIndex(self._call('index', '@0,0'))
+
+        state = str(self._call('cget', '-state'))
+        self._call('configure', '-state', 'normal')
+        self._call('delete', '1.0', 'end')
+        self._call('insert', '1.0', self.document.slice(self.document.lineStart(firstLine), self.document.lineEnd(self.document.lineStart(lastLine))))
+        self._call('configure', '-state', state)
+        self.lineOffset = firstLine - 1
+
+        self._call('mark', 'set', 'insert', self._clampedIndex(cursor))
+        if selection and all(self.widgetIndex(index) is not None for index in selection):
+            self._call('tag', 'add', 'sel', *[self.widgetIndex(index) for index in selection])
+        self._call('yview', self._clampedIndex(top))
+        for listener in self.windowListeners:
+            listener()
+
+    def appendText(self, text):
+        # adds text to the end of the document without putting it into the widget (used to load a file in virtual mode)
+        offset = len(self.document)
+        left = self.document.slice(offset - 1, offset)
+        reachesEnd = self.lineOffset + int(self._call('index', 'end - 1 chars').split('.')[0]) >= self.document.lineCount()
+        if self.wordFrequencies is not None:
+            self.wordFrequencies.inserted(self._wordNeighbours(offset, offset)[0], text, '')
+        self.wordCounter.inserted(left, text, '')
+        self._notify(TextDelta('insert', self.document.index(offset), text))
+        if reachesEnd:
+            self.setWindow(self.lineOffset + 1) # the widget isn't full yet (or its last line was only loaded partly)
+
+    def _editOutsideWindow(self, index, removed, text):
+        # replaces removed at the document index with text, where that isn't (completely) in the widget; setWindow has to be called afterwards
+        offset1 = self.document.offset(index)
+        offset2 = offset1 + len(removed)
+        left, right = self._neighbours(offset1, offset2)
+        if self.wordFrequencies is not None:
+            wordLeft, wordRight = self._wordNeighbours(offset1, offset2)
+            self.wordFrequencies.deleted(wordLeft, removed, wordRight)
+            self.wordFrequencies.inserted(wordLeft, text, wordRight)
+        self.wordCounter.deleted(left, removed, right)
+        self.wordCounter.inserted(left, text, right)
+        self._notify(TextDelta('delete', index, removed))
+        self._notify(TextDelta('insert', index, text))
+
+    def clear(self):
+        # removes the whole text (e.g. before another chapter is loaded)
+        if not self.virtual:
+            self.delete('1.0', 'end')
+            return
+        self._editOutsideWindow('1.0', self.document.text(), '')
+        self.setWindow(1)
+
+    def goToStart(self, event=None):
+        self._call('mark', 'set', 'insert', self.showIndex('1.0'))
+        self.see('insert')
+        return 'break'
+
+    def goToEnd(self, event=None):
+        self._call('mark', 'set', 'insert', self.showIndex(self.document.index(len(self.document))))
+        self.see('insert')
+        return 'break'
+
+    def bind(self, sequence=None, func=None, add=None):
+        # every handler bound to the textbox is measured by the instrumentation (it just returns func, if instrumentation is off)
+        if func is not None:
+            func = self.instrumentation.wrap(f'{sequence} {getattr(func, "__name__", "")}', func)
+        return tk.Text.bind(self, sequence, func, add)
+
     # Word Removal
     def wordRemovalLeft(self, event=None):
         cursorPos = self.index(tk.INSERT)
+        self.undoJournal.beginCompound()
         self.delete(f'{cursorPos} - 1 chars wordstart', cursorPos)
-        self.insert(cursorPos, ' ') # inserts a space, as the regular backSpace still triggers
+        self.insert(self.index(tk.INSERT), ' ') # inserts a space, as the regular backSpace still triggers
+        self.undoJournal.endCompound()
 
     def wordRemovalRight(self, event=None):
         cursorPos = self.index(tk.INSERT)
+        self.undoJournal.closeGroup()
         self.delete(cursorPos, f"{self.index(f'{cursorPos} wordend')} - 1 chars") # removes one char, as the regular del key still fires
 
+    # Edit Recording
+    def _call(self, *args):
+        # calls the real tk widget command, bypassing _dispatch
+        return self.tk.call((self._tkCommand,) + args)
+
+    def _dispatch(self, command, *args):
+        # called for insert, delete and replace; errors are swallowed, as an exception raised in here would otherwise end the mainloop
+        if self.instrumentation.detailed:
+            startTime = time.perf_counter()
+            try:
+                return self._handleCommand(command, *args)
+            finally:
+                self.instrumentation.record(f'edit: {command}', time.perf_counter() - startTime)
+        return self._handleCommand(command, *args)
+
+    def _handleCommand(self, command, *args):
+        try:
+            if str(self._call('cget', '-state')) == 'disabled':
+                return '' # tk ignores edits while disabled (e.g. while a file is loading), so the document mustn't record them either
+            if command == 'insert':
+                return self._recordInsert(*args)
+            if command == 'delete':
+                return self._recordDelete(*args)
+            if command == 'replace' and len(args) >= 3:
+                start = self._call('index', args[0])
+                self.undoJournal.beginCompound()
+                self._recordDelete(start, args[1])
+                result = self._recordInsert(start, *args[2:])
+                self.undoJournal.endCompound()
+                return result
+            return ''
+        except tk.TclError:
+            return ''
+
+    def _insertIndex(self, index):
+        # tk never inserts behind the final newline
+        index = self._call('index', index)
+        if self._call('compare', index, '==', 'end'):
+            index = self._call('index', 'end - 1 chars')
+        return index
+
+    def _deleteRange(self, index1, index2=None):
+        # returns the range tk will really delete (see DeleteIndexRange in tkText.c) or None, if nothing is deleted
+        index1 = self._call('index', index1)
+        index2 = self._call('index', index2) if index2 is not None else self._call('index', f'{index1} + 1 chars')
+        if not self._call('compare', index1, '<', index2):
+            return None
+        if self._call('compare', index2, '==', 'end'):
+            index2 = self._call('index', 'end - 1 chars')
+            if index1.endswith('.0') and index1 != '1.0':
+                index1 = self._call('index', f'{index1} - 1 chars')
+        if index1 == index2:
+            return None
+        return (index1, index2)
+
+    def _editState(self):
+        # the cursor and the selection, so undo can bring them back
+        return (self.documentIndex(self._call('index', 'insert')), tuple(self.documentIndex(index) for index in self._call('tag', 'ranges', 'sel')))
+
+    def _neighbours(self, offset1, offset2):
+        # the char before offset1 and the char at offset2 (nothing at the end of the text)
+        return (self.document.slice(offset1 - 1, offset1), self.document.charAt(offset2))
+
+    def _wordNeighbours(self, offset1, offset2):
+        # the parts of the words touching offset1 (from the left) and offset2 (from the right)
+        left, start = '', offset1
+        while start > 0:
+            piece = self.document.slice(max(0, start - WORD_CONTEXT), start)
+            part = WORD_CHARS_BEFORE.search(piece).group()
+            left, start = part + left, start - len(part)
+            if len(part) < len(piece):
+                break
+        right, end = '', offset2
+        while end < len(self.document):
+            piece = self.document.slice(end, end + WORD_CONTEXT)
+            part = WORD_CHARS_AFTER.match(piece).group()
+            right, end = right + part, end + len(part)
+            if len(part) < len(piece):
+                break
+        return (left, right)
+
+    def _performInsert(self, index, *args):
+        # inserts into the widget and keeps the word count up to date; index has to be normalized already
+        # indices passed to the _perform methods are the widget's, the deltas they create use the document's (the same, unless editing virtually)
+        text = ''.join(str(chars) for chars in args[::2])
+        offset = self.document.offset(self.documentIndex(index))
+        left, right = self._neighbours(offset, offset)
+        if self.wordFrequencies is not None:
+            wordLeft, wordRight = self._wordNeighbours(offset, offset)
+            self.wordFrequencies.inserted(wordLeft, text, wordRight)
+        result = self._call('insert', index, *args)
+        self.wordCounter.inserted(left, text, right)
+        delta = TextDelta('insert', self.documentIndex(index), text)
+        self._notify(delta)
+        return (result, delta)
+
+    def _performDelete(self, index1, index2):
+        # deletes from the widget and keeps the word count up to date; the range has to come from _deleteRange
+        offset1, offset2 = self.document.offset(self.documentIndex(index1)), self.document.offset(self.documentIndex(index2))
+        removed = self.document.slice(offset1, offset2)
+        left, right = self._neighbours(offset1, offset2)
+        if self.wordFrequencies is not None:
+            wordLeft, wordRight = self._wordNeighbours(offset1, offset2)
+            self.wordFrequencies.deleted(wordLeft, removed, wordRight)
+        result = self._call('delete', index1, index2)
+        self.wordCounter.deleted(left, removed, right)
+        delta = TextDelta('delete', self.documentIndex(index1), removed)
+        self._notify(delta)
+        return (result, delta)
+
+    def _performReplace(self, index1, index2, text):
+        offset1, offset2 = self.document.offset(self.documentIndex(index1)), self.document.offset(self.documentIndex(index2))
+        removed = self.document.slice(offset1, offset2)
+        left, right = self._neighbours(offset1, offset2)
+        if self.wordFrequencies is not None:
+            wordLeft, wordRight = self._wordNeighbours(offset1, offset2)
+            self.wordFrequencies.deleted(wordLeft, removed, wordRight)
+            self.wordFrequencies.inserted(wordLeft, text, wordRight)
+        self._call('replace', index1, index2, text)
+        self.wordCounter.deleted(left, removed, right)
+        self.wordCounter.inserted(left, text, right)
+        self._notify(TextDelta('delete', self.documentIndex(index1), removed))
+        self._notify(TextDelta('insert', self.documentIndex(index1), text))
+
+    def _notify(self, delta):
+        # the document is updated right away (the next edit needs it); the listeners get the edit once tk is idle
+        if not delta.text:
+            return
+        self.document.apply(delta)
+        self.editCount += 1
+        if not self.editListeners:
+            return
+
+        if self.pendingDeltas:
+            merged = mergeDeltas(self.pendingDeltas[-1], delta)
+            if merged is not None:
+                self.pendingDeltas[-1] = merged
+                return
+        self.pendingDeltas.append(delta)
+        if self.flushScheduled is None:
+            self.flushScheduled = self.after_idle(self.add_changes)
+
+    def _recordInsert(self, index, *args):
+        index = self._insertIndex(index)
+        state = self._editState() if self.recording else None
+        result, delta = self._performInsert(index, *args)
+        if self.recording:
+            self.undoJournal.record(delta, *state)
+        return result
+
+    def _recordDelete(self, *args):
+        if len(args) > 2: # multiple ranges; delete them back to front so the indices stay valid
+            ranges = [self._deleteRange(*args[i:i + 2]) for i in range(0, len(args) - 1, 2)]
+            for deleteRange in sorted((r for r in ranges if r), key=lambda r: tuple(map(int, r[0].split('.'))), reverse=True):
+                self._recordDelete(*deleteRange)
+            return ''
+
+        deleteRange = self._deleteRange(*args)
+        if deleteRange is None:
+            return ''
+        state = self._editState() if self.recording else None
+        result, delta = self._performDelete(*deleteRange)
+        if self.recording:
+            self.undoJournal.record(delta, *state)
+        return result
+
+    def applyDeltas(self, deltas):
+        # applies deltas to the widget without recording them; only the edited range is touched, so tk doesn't have to lay out the whole text again
+        # a delete directly followed by an insert at the same position (e.g. text typed over a selection) is done in one replace
+        i = 0
+        while i < len(deltas):
+            delta = deltas[i]
+            index = self.showIndex(delta.index) if self.virtual else delta.index
+            if self.virtual and delta.kind == 'delete' and self.widgetIndex(advanceIndex(delta.index, delta.text)) is None:
+                # when editing virtually, a delete might reach further than the lines in the widget
+                replaced = i + 1 < len(deltas) and deltas[i + 1].kind == 'insert' and deltas[i + 1].index == delta.index
+                self._editOutsideWindow(delta.index, delta.text, deltas[i + 1].text if replaced else '')
+                self.setWindow(self.lineOffset + 1)
+                self._call('mark', 'set', 'insert', self.showIndex(advanceIndex(delta.index, deltas[i + 1].text) if replaced else delta.index))
+                i += 1 + replaced
+                continue
+
+            if delta.kind == 'insert':
+                self._performInsert(index, delta.text)
+                self._call('mark', 'set', 'insert', advanceIndex(index, delta.text))
+            elif i + 1 < len(deltas) and deltas[i + 1].kind == 'insert' and deltas[i + 1].index == delta.index:
+                self._performReplace(index, advanceIndex(index, delta.text), deltas[i + 1].text)
+                self._call('mark', 'set', 'insert', advanceIndex(index, deltas[i + 1].text))
+                i += 1
+            else:
+                self._performDelete(index, advanceIndex(index, delta.text))
+                self._call('mark', 'set', 'insert', index)
+            i += 1
+
+    def replaceRanges(self, replacements):
+        # replaces many parts of the text at once (e.g. replace all); every part is a single tk replace and all of them together are one undo step
+        # replacements are (start offset, end offset, text) in order; they're done back to front, so the offsets in front stay valid
+        if not replacements:
+            return
+        state = self._editState() if self.recording else None
+        self.undoJournal.beginCompound()
+        for start, end, text in reversed(replacements):
+            index1, index2 = self.document.index(start), self.document.index(end)
+            removed = self.document.slice(start, end)
+            if not self.virtual:
+                self._performReplace(index1, index2, text)
+            elif self.widgetIndex(index1) is not None and self.widgetIndex(index2) is not None:
+                self._performReplace(self.widgetIndex(index1), self.widgetIndex(index2), text)
+            else:
+                self._editOutsideWindow(index1, removed, text) # the widget is updated once all replacements are done
+            if self.recording:
+                self.undoJournal.record(TextDelta('delete', index1, removed), *state)
+                self.undoJournal.record(TextDelta('insert', index1, text), *state)
+        self.undoJournal.endCompound()
+        if self.virtual:
+            self.setWindow(self.lineOffset + 1)
+
+    def invertDeltas(self, deltas):
+        # the deltas that revert deltas
+        return [TextDelta('delete' if delta.kind == 'insert' else 'insert', delta.index, delta.text) for delta in reversed(deltas)]
+
+    def restoreSelection(self, selection):
+        # selection is in the indices of the document
+        self._call('tag', 'remove', 'sel', '1.0', 'end')
+        if selection:
+            self._call('tag', 'add', 'sel', *[self._clampedIndex(index) for index in selection])
+
+    def text(self):
+        # the whole text without tk's trailing newline; doesn't need to ask the widget
+        return self.document.text()
+
+    def wordCount(self):
+        return self.wordCounter.count
+
+    def resetHistory(self):
+        # forgets every undo step (e.g. after the file has been loaded)
+        self.undoJournal.clear()
+
+    def destroy(self):
+        tk.Text.destroy(self)
+        for command in (self._w, self._editCommand): # the proc and the python command outlive the widget
+            try:
+                self.tk.deletecommand(command)
+            except tk.TclError:
+                pass
+
     # Undo/Redo
     def undo(self, event=None):
-        if self.steps != 0:
-            self.steps -= 1
-            self.delete('1.0','end')
-            self.insert('end', self.changes[self.steps])
+        group = self.undoJournal.undo()
+        if group is not None:
+            self.applyDeltas(self.invertDeltas(group.deltas))
+            # puts cursor & selection back where they were before the edit
+            if group.cursor is not None:
+                self._call('mark', 'set', 'insert', self.showIndex(group.cursor) if self.virtual else group.cursor)
+            self.restoreSelection(group.selection)
+            self.see(tk.INSERT) # only scrolls, if the edit isn't visible anyway
+        return 'break'
 
     def redo(self, event=None):
-        if self.steps < len(self.changes):
-            self.delete('1.0','end')
-            self.insert('end', self.changes[self.steps])
-            self.steps += 1
+        group = self.undoJournal.redo()
+        if group is not None:
+            self.applyDeltas(group.deltas) # leaves the cursor behind the last redone edit
+            self.restoreSelection(())
+            self.see(tk.INSERT)
+        return 'break'
 
     def add_changes(self, event=None):
-        if self.get('1.0','end') != self.changes[-1]:
-            self.changes.append(self.get('1.0','end'))
-            self.steps += 1
+        # hands the edits collected since the last call to the editListeners as one transaction (called when tk is idle, or before saving)
+        if self.flushScheduled is not None:
+            self.after_cancel(self.flushScheduled)
+            self.flushScheduled = None
+        deltas, self.pendingDeltas = self.pendingDeltas, []
+        for delta in deltas:
+            for listener in self.editListeners:
+                listener(delta)
 
     # markdown shortcuts
-    def postItalicText(self, event=None):
-        # delete last typed character (tab) (for explanation see italicText method)
-        cursorPos = self.index(tk.INSERT)
-        self.delete(f'{cursorPos} - 1 chars', cursorPos)
-
     def italicText(self, event=None): # *italic*
         # italize text
         self.markText(SYNTAX_FRONT='*', SYNTAX_BACK='*')
-        self.after(1, self.postItalicText)
-        # Ctrl+I is interpreted as Tab; to circumvent this a function is called 1 ms after the text has been marked that instantly deletes the tab again; this only works, because the Tab is always only send after the function (-> method) call
+        return 'break' # Ctrl+I is interpreted as Tab by the Text class binding; 'break' keeps the Tab from being inserted (and from ending up in the undo history)
         
     def boldText(self, event=None): # **bold**
         self.markText(SYNTAX_FRONT='**', SYNTAX_BACK='**')
@@ -109,6 +1537,8 @@ class BetterText(tk.Text):
         # if any text is selected, toggle marks on selected text
         # else insert SYNTAX at textCursor
 
+        self.undoJournal.beginCompound() # adding/removing the syntax is a single undo step
+
         if self.tag_ranges('sel'): # if any text is selected
             isMarked = self.isMarked(SYNTAX_FRONT, SYNTAX_BACK)
             selection = self.selection_get() # store the selected text
@@ -131,10 +1561,576 @@ class BetterText(tk.Text):
             self.insert(cursorPos, f'{SYNTAX_FRONT}{SYNTAX_BACK}')
             self.mark_set('insert', f'{self.index(tk.INSERT)} - {len(SYNTAX_BACK)} chars') # applies new position (between front and back Syntax) to cursor
 
-class Writer(): # a tkinter window for distraction-free writing
-    def __init__(self, blockStyle=1, blockValue=1, fileLocation='test.md', autosaveInterval=300, displayHeader=True) -> None:
+        self.undoJournal.endCompound()
+
+def writeFileAtomically(fileLocation, text):
+    # writes text (a string or a list of strings) to a temporary file next to fileLocation and only then replaces fileLocation with it
+    # that way a crash (or a full disk) in the middle of saving can never leave a half written file behind
+    directory = os.path.dirname(os.path.abspath(fileLocation))
+    tempLocation = os.path.join(directory, f'.{os.path.basename(fileLocation)}.{os.getpid()}.tmp')
+    try:
+        with open(tempLocation, 'w', encoding=ENCODING) as file:
+            if isinstance(text, str):
+                file.write(text)
+            else: # the pieces of a Document, joined here instead of on the UI thread
+                file.writelines(text)
+            file.flush()
+            os.fsync(file.fileno()) # makes sure the text really is on the disk before the old file is replaced
+        if os.path.exists(fileLocation):
+            try:
+                shutil.copymode(fileLocation, tempLocation)
+            except OSError:
+                pass
+        os.replace(tempLocation, fileLocation)
+    except:
+        if os.path.exists(tempLocation):
+            os.remove(tempLocation)
+        raise
+
+class LineHighlighter(): # highlights the lines of a BetterText in the background; only lines that were edited or scrolled into view are looked at
+    def __init__(self, text) -> None:
+        self.text = text
+        self.dirty = set() # lines that have to be highlighted (again)
+        self.covered = None # (first, last) lines that were highlighted since the view last jumped somewhere else
+        self.scheduled = None
+        text.editListeners.append(self.edited)
+        text.viewListeners.append(self.schedule)
+        text.windowListeners.append(self.reset)
+        self.schedule()
+
+    def reset(self):
+        # other lines were swapped into the widget (see BetterText.setWindow); everything in view is highlighted again
+        self.dirty = set()
+        self.covered = None
+        self.schedule()
+
+    def edited(self, delta):
+        # moves the line numbers behind the edit by the newlines it added/removed and marks the edited lines as dirty
+        # lines outside of the covered ones are left alone, they are highlighted once they are scrolled into view anyway
+        if self.covered is None:
+            return
+        line = int(delta.index.split('.')[0]) - self.text.lineOffset # the delta's line is the document's, the covered lines are the widget's
+        newlines = delta.text.count('\n')
+        first, last = self.covered
+        if newlines and delta.kind == 'insert':
+            self.dirty = {dirty + newlines if dirty > line else dirty for dirty in self.dirty}
+            self.covered = (first + newlines if first > line else first, last + newlines if last > line else last) # text inserted behind the last covered line isn't covered yet
+        elif newlines:
+            self.dirty = {dirty - newlines if dirty > line + newlines else min(dirty, line) for dirty in self.dirty}
+            self.covered = (max(line, first - newlines) if first > line else first, max(line, last - newlines) if last > line else last)
+        first, last = self.covered
+        edited = range(max(first, line), min(last, line + (newlines if delta.kind == 'insert' else 0)) + 1)
+        if edited:
+            self.dirty.update(edited)
+            self.schedule()
+
+    def schedule(self, *args):
+        if self.scheduled is None:
+            self.scheduled = self.text.after_idle(self.highlightSlice)
+
+    def visibleLines(self):
+        # the lines on screen plus HIGHLIGHT_MARGIN above and below
+        first = int(self.text.index('@0,0').split('.')[0])
+        last = int(self.text.index(f'@0,{self.text.winfo_height()}').split('.')[0])
+        lastLine = int(self.text.index('end - 1 chars').split('.')[0])
+        return (max(1, first - HIGHLIGHT_MARGIN), min(lastLine, last + HIGHLIGHT_MARGIN))
+
+    def highlightSlice(self):
+        self.scheduled = None
+        first, last = self.visibleLines()
+
+        # lines that just came into view have to be highlighted too
+        if self.covered is None or first > self.covered[1] + 1 or last < self.covered[0] - 1:
+            self.dirty = {line for line in self.dirty if first <= line <= last} # far away dirty lines are redone anyway, once they are in view again
+            self.dirty.update(range(first, last + 1))
+            self.covered = (first, last)
+        elif first < self.covered[0] or last > self.covered[1]:
+            self.dirty.update(range(first, self.covered[0]))
+            self.dirty.update(range(self.covered[1] + 1, last + 1))
+            self.covered = (min(first, self.covered[0]), max(last, self.covered[1]))
+
+        # visible lines first, the rest of the dirty lines waits until it is scrolled into view
+        lines = sorted(line for line in self.dirty if first <= line <= last)
+        for line in lines[:HIGHLIGHT_SLICE]:
+            self.dirty.discard(line)
+            self.highlightLine(line)
+        if len(lines) > HIGHLIGHT_SLICE:
+            self.scheduled = self.text.after(1, self.highlightSlice) # gives tk the chance to handle your typing in between
+
+    def highlightLine(self, line):
+        pass
+
+    def stop(self, *tags):
+        # stops highlighting and removes tags from the whole text
+        self.text.editListeners.remove(self.edited)
+        self.text.viewListeners.remove(self.schedule)
+        self.text.windowListeners.remove(self.reset)
+        if self.scheduled is not None:
+            self.text.after_cancel(self.scheduled)
+            self.scheduled = None
+        for tag in tags:
+            self.text.tag_remove(tag, '1.0', 'end')
+
+class MarkdownHighlighter(LineHighlighter): # shows headings, **bold**, *italic* and <u>underlined</u> text as such
+    def __init__(self, text) -> None:
+        font = tkfont.Font(font=text.cget('font')).actual()
+        family, size = font['family'], font['size']
+        text.tag_configure('mdHeading', font=(family, size + 4, 'bold'))
+        text.tag_configure('mdBold', font=(family, size, 'bold'))
+        text.tag_configure('mdItalic', font=(family, size, 'italic'))
+        text.tag_configure('mdUnderline', underline=True)
+        text.tag_configure('mdSyntax', foreground='#999999')
+        LineHighlighter.__init__(self, text)
+
+    def highlightLine(self, line):
+        start = f'{line}.0'
+        for tag in MARKDOWN_TAGS:
+            self.text.tag_remove(tag, start, f'{line}.end')
+        content = self.text.get(start, f'{line}.end')
+        if not content:
+            return
+
+        heading = MARKDOWN_HEADING.match(content)
+        if heading:
+            self.text.tag_add('mdHeading', start, f'{line}.end')
+            self.text.tag_add('mdSyntax', start, f'{line}.{len(heading.group(1))}')
+
+        column = lambda position: f'{line}.{tkLength(content[:position])}' # python's positions aren't tk's columns on lines with emoji
+        for pattern, tag, front, back in MARKDOWN_INLINE:
+            for match in pattern.finditer(content):
+                self.text.tag_add(tag, column(match.start()), column(match.end()))
+                self.text.tag_add('mdSyntax', column(match.start()), column(match.start() + front), column(match.end() - back), column(match.end()))
+
+class BloomFilter(): # a compact set of words: "maybe in it" or "definitely not"; it's read straight from its file with mmap, so a big word list doesn't slow down starting the writer
+    def __init__(self, location) -> None:
+        with open(location, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes, self.sourceSize, self.sourceTime = BLOOM_HEADER.unpack_from(self.data)
+        if magic != BLOOM_MAGIC:
+            self.data.close()
+            raise ValueError(f'"{location}" is not a word list made by A_WritingProgram')
+
+    @staticmethod
+    def positions(word, bits, hashes):
+        # the bits of a word (double hashing: two hashes are enough to get as many positions as needed)
+        digest = hashlib.blake2b(word.encode(ENCODING, 'surrogatepass'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % bits for i in range(hashes)]
+
+    @staticmethod
+    def build(words, location, sourceStat):
+        # writes a filter for words to location
+        bits = max(8, math.ceil(-len(words) * math.log(BLOOM_ERROR_RATE) / math.log(2) ** 2))
+        hashes = max(1, round(bits / max(1, len(words)) * math.log(2)))
+        data = bytearray(bits // 8 + 1)
+        for word in words:
+            for position in BloomFilter.positions(word, bits, hashes):
+                data[position >> 3] |= 1 << (position & 7)
+
+        tempLocation = f'{location}.{os.getpid()}.tmp'
+        with open(tempLocation, 'wb') as file:
+            file.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes, sourceStat.st_size, sourceStat.st_mtime_ns))
+            file.write(data)
+        os.replace(tempLocation, location)
+
+    def __contains__(self, word):
+        offset = BLOOM_HEADER.size
+        for position in self.positions(word, self.bits, self.hashes):
+            if not self.data[offset + (position >> 3)] >> (position & 7) & 1:
+                return False
+        return True
+
+    def close(self):
+        self.data.close()
+
+def loadDictionary(location):
+    # the word list at location (one word per line) as a BloomFilter; it's only made again, if the word list changed
+    stat = os.stat(location)
+    bloomLocation = location + BLOOM_SUFFIX
+    if os.path.exists(bloomLocation):
+        try:
+            words = BloomFilter(bloomLocation)
+            if (words.sourceSize, words.sourceTime) == (stat.st_size, stat.st_mtime_ns):
+                return words
+            words.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+    with open(location, 'r', encoding=ENCODING, errors='replace') as file:
+        words = {line.strip().lower() for line in file if line.strip()}
+    BloomFilter.build(words, bloomLocation, stat)
+    return BloomFilter(bloomLocation)
+
+class SpellChecker(LineHighlighter): # underlines misspelled words; like the markdown highlighting only the lines you edit or scroll to are checked, whenever there's time
+    def __init__(self, text, words) -> None:
+        self.words = words
+        text.tag_configure('misspelled', underline=True)
+        try:
+            text.tag_configure('misspelled', underlinefg='#cc3333')
+        except tk.TclError:
+            text.tag_configure('misspelled', foreground='#cc3333') # older tk versions can't color the underline
+        LineHighlighter.__init__(self, text)
+
+    def isCorrect(self, word):
+        word = word.lower().replace('’', "'")
+        if word in self.words:
+            return True
+        return word.endswith("'s") and word[:-2] in self.words # possessives are rarely in word lists
+
+    def highlightLine(self, line):
+        self.text.tag_remove('misspelled', f'{line}.0', f'{line}.end')
+        content = self.text.get(f'{line}.0', f'{line}.end')
+        content = SPELLING_IGNORED.sub(lambda match: ' ' * len(match.group()), content) # same length, so the columns stay right
+        misspelled = []
+        for match in SPELLING_WORD.finditer(content):
+            if len(match.group()) > 1 and not self.isCorrect(match.group()):
+                misspelled += [f'{line}.{tkLength(content[:match.start()])}', f'{line}.{tkLength(content[:match.end()])}']
+        if misspelled:
+            self.text.tag_add('misspelled', *misspelled)
+
+class RepetitionHighlighter(LineHighlighter): # highlights words you used shortly before or after already
+    def __init__(self, text) -> None:
+        text.tag_configure('repeated', background='#ffd9b3')
+        LineHighlighter.__init__(self, text)
+
+    def edited(self, delta):
+        # a word repeated in the lines around the edit might not be repeated anymore (or be now)
+        LineHighlighter.edited(self, delta)
+        if self.covered is not None:
+            line = int(delta.index.split('.')[0]) - self.text.lineOffset
+            self.dirty.update(range(max(self.covered[0], line - REPETITION_LINES), min(self.covered[1], line + REPETITION_LINES) + 1))
+
+    def highlightLine(self, line):
+        self.text.tag_remove('repeated', f'{line}.0', f'{line}.end')
+        document = self.text.document
+        start = document.lineStart(line + self.text.lineOffset)
+        end = document.lineEnd(start)
+        before = document.slice(max(0, start - REPETITION_CONTEXT), start)
+        text = before + document.slice(start, end + REPETITION_CONTEXT)
+
+        # the distance (in words) of every word to the same word before and after it
+        words = [(match.start() - len(before), match.end() - len(before), match.group().lower()) for match in REPETITION_WORD.finditer(text)]
+        distances = [REPETITION_WINDOW + 1] * len(words)
+        for order in (range(len(words)), range(len(words) - 1, -1, -1)):
+            lastSeen = {}
+            for i in order:
+                word = words[i][2]
+                if word in lastSeen:
+                    distances[i] = min(distances[i], abs(i - lastSeen[word]))
+                lastSeen[word] = i
+
+        repeated = []
+        for (wordStart, wordEnd, word), distance in zip(words, distances):
+            if 0 <= wordStart < end - start and distance <= REPETITION_WINDOW and isRepeatable(word):
+                repeated += [f'{line}.{tkLength(text[len(before):len(before) + wordStart])}', f'{line}.{tkLength(text[len(before):len(before) + wordEnd])}']
+        if repeated:
+            self.text.tag_add('repeated', *repeated)
+
+class HeadingIndex(): # the headings of a BetterText and the lines they are on, kept up to date from the edits so the text never has to be searched as a whole
+    def __init__(self, text) -> None:
+        self.text = text
+        self.lines = [] # the lines with a heading, sorted
+        self.headings = [] # (level, title) of the heading on each of these lines
+        self.dirty = set() # lines that have to be looked at again, as they were only partly edited
+        self.scheduled = None
+        self.changeListeners = [] # functions called after the headings changed
+        text.editListeners.append(self.edited)
+
+    def edited(self, delta):
+        line = int(delta.index.split('.')[0])
+        newlines = delta.text.count('\n')
+        position = bisect.bisect_right(self.lines, line)
+
+        if delta.kind == 'insert':
+            if newlines:
+                self.lines[position:] = [heading + newlines for heading in self.lines[position:]]
+                self.dirty = {dirty + newlines if dirty > line else dirty for dirty in self.dirty}
+
+                # the lines that were inserted as a whole are all in the delta, so they are searched right away (this is how a file is indexed while it's loaded)
+                first, last = delta.text.index('\n') + 1, delta.text.rindex('\n')
+                lines, headings = [], []
+                current, searched = line + 1, first
+                for match in MARKDOWN_HEADINGS.finditer(delta.text, first, last):
+                    current += delta.text.count('\n', searched, match.start())
+                    searched = match.start()
+                    lines.append(current)
+                    headings.append((len(match.group(1)), match.group(2).strip()))
+                self.lines[position:position] = lines
+                self.headings[position:position] = headings
+            self.dirty.update((line, line + newlines))
+        else:
+            if newlines:
+                end = bisect.bisect_right(self.lines, line + newlines)
+                del self.lines[position:end]
+                del self.headings[position:end]
+                self.lines[position:] = [heading - newlines for heading in self.lines[position:]]
+                self.dirty = {dirty - newlines if dirty > line + newlines else min(dirty, line) for dirty in self.dirty}
+            self.dirty.add(line)
+
+        if self.scheduled is None:
+            self.scheduled = self.text.after_idle(self.update)
+
+    def update(self):
+        # looks at the partly edited lines once all edits reached the index (their text is read from the document, which is always up to date)
+        self.scheduled = None
+        if self.text.pendingDeltas:
+            return # edited schedules the next update once these are flushed
+        document = self.text.document
+        lineCount = document.lineCount()
+        for line in sorted(self.dirty):
+            if line > lineCount:
+                break
+            start = document.lineStart(line)
+            self.setLine(line, document.slice(start, document.lineEnd(start)))
+        self.dirty.clear()
+
+        for listener in self.changeListeners:
+            listener()
+
+    def setLine(self, line, content):
+        match = MARKDOWN_HEADINGS.match(content)
+        position = bisect.bisect_left(self.lines, line)
+        present = position < len(self.lines) and self.lines[position] == line
+        if match and present:
+            self.headings[position] = (len(match.group(1)), match.group(2).strip())
+        elif match:
+            self.lines.insert(position, line)
+            self.headings.insert(position, (len(match.group(1)), match.group(2).strip()))
+        elif present:
+            del self.lines[position]
+            del self.headings[position]
+
+    def previous(self, line):
+        # the line of the last heading above line (or None)
+        position = bisect.bisect_left(self.lines, line)
+        return self.lines[position - 1] if position > 0 else None
+
+    def next(self, line):
+        # the line of the first heading below line (or None)
+        position = bisect.bisect_right(self.lines, line)
+        return self.lines[position] if position < len(self.lines) else None
+
+class BackgroundSaver(): # writes snapshots of the text on a worker thread, so a slow disk never stalls typing
+    def __init__(self) -> None:
+        self.requests = queue.Queue()
+        self.results = queue.Queue() # (fileLocation, seconds the save took, exception or None)
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def save(self, fileLocation, text, afterWrite=None):
+        # afterWrite is called on the worker thread right after the file was replaced successfully
+        self.requests.put((fileLocation, text, afterWrite))
+
+    def _work(self):
+        pending = [] # [request, how many queued requests it stands for], in the order their files were first requested
+        while True:
+            if not pending:
+                pending.append([self.requests.get(), 1])
+            # only the newest snapshot of every file is worth writing; it takes the place of the older ones still waiting, so the order stays the same
+            while True:
+                try:
+                    newer = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                for entry in pending:
+                    if newer is not None and entry[0] is not None and entry[0][0] == newer[0]:
+                        entry[0] = newer
+                        entry[1] += 1
+                        break
+                else:
+                    pending.append([newer, 1]) # a different file (or the stop signal) is handled afterwards
+            request, count = pending.pop(0)
+
+            if request is None:
+                self.requests.task_done()
+                return
+
+            fileLocation, text, afterWrite = request
+            startTime = time.perf_counter()
+            try:
+                writeFileAtomically(fileLocation, text)
+                if afterWrite is not None:
+                    afterWrite()
+            except Exception as exception:
+                self.results.put((request[0], time.perf_counter() - startTime, exception))
+            else:
+                self.results.put((request[0], time.perf_counter() - startTime, None))
+            finally:
+                for _ in range(count):
+                    self.requests.task_done()
+
+    def pending(self):
+        return self.requests.unfinished_tasks > 0
+
+    def wait(self):
+        # blocks until everything handed to save is written (or has failed)
+        self.requests.join()
+
+    def finishedSaves(self):
+        # every result that came in since the last call
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        self.requests.put(None)
+
+class SearchWorker(): # searches a snapshot of the text on a worker thread, so searching a long text never freezes the window
+    def __init__(self) -> None:
+        self.requests = queue.Queue()
+        self.results = queue.Queue() # (generation, kind, data): 'matches' with a list of matches, 'done' with their number or 'error' with a message
+        self.generation = 0 # counts the searches; a search stops as soon as it isn't the newest one anymore
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def search(self, pieces, query, regex=False, replacement=None):
+        # starts searching the pieces of a Document (and cancels the search before); returns the generation its results come with
+        # matches are (start offset, end offset), or (start offset, end offset, replaced text) if a replacement is given
+        self.generation += 1
+        self.requests.put((self.generation, pieces, query, regex, replacement))
+        return self.generation
+
+    def cancel(self):
+        self.generation += 1
+
+    def _work(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            generation, pieces, query, regex, replacement = request
+            if generation != self.generation:
+                continue # there is a newer search waiting already
+
+            try:
+                pattern = re.compile(query if regex else re.escape(query), re.MULTILINE)
+                text = ''.join(pieces)
+                batch, count = [], 0
+                for match in pattern.finditer(text):
+                    if match.start() == match.end():
+                        continue # empty matches (e.g. of "a*") can't be highlighted
+                    if replacement is None:
+                        batch.append(match.span())
+                    else:
+                        batch.append((match.start(), match.end(), match.expand(replacement) if regex else replacement))
+                    if len(batch) == SEARCH_BATCH:
+                        if generation != self.generation:
+                            break
+                        self.results.put((generation, 'matches', batch))
+                        count += len(batch)
+                        batch = []
+                else:
+                    self.results.put((generation, 'matches', batch))
+                    self.results.put((generation, 'done', count + len(batch)))
+            except re.error as exception:
+                self.results.put((generation, 'error', str(exception)))
+
+    def finishedResults(self, generation, limit=None):
+        # the results of the search with this generation that came in since the last call (the ones of older searches are dropped)
+        results = []
+        while limit is None or len(results) < limit:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if result[0] == generation:
+                results.append(result[1:])
+        return results
+
+    def close(self):
+        self.cancel()
+        self.requests.put(None)
+
+def isProject(location):
+    # a project is either a directory of chapters or its manifest
+    return os.path.isdir(location) or os.path.basename(location) == PROJECT_MANIFEST
+
+class Project(): # a manuscript split into chapter files; only the chapter you write in is loaded, the word counts of the others come from a cache
+    def __init__(self, location) -> None:
+        if os.path.isdir(location):
+            self.directory = location
+            manifest = os.path.join(location, PROJECT_MANIFEST)
+        else:
+            self.directory = os.path.dirname(os.path.abspath(location))
+            manifest = location
+
+        if os.path.isfile(manifest):
+            with open(manifest, 'r', encoding=ENCODING) as file:
+                names = [line.strip() for line in file if line.strip()]
+        else:
+            names = sorted(name for name in os.listdir(self.directory) if name.lower().endswith(CHAPTER_EXTENSIONS))
+        self.chapters = [os.path.join(self.directory, name) for name in names]
+
+        if not self.chapters:
+            raise ValueError(f'"{location}" contains no chapters')
+        for chapter in self.chapters:
+            if not os.path.isfile(chapter):
+                raise ValueError(f'the chapter "{chapter}" does not exist')
+
+        # the cache maps each chapter to its word count, together with the modification time and size of the file it was counted in
+        # a chapter that was changed since (e.g. in another editor) doesn't match anymore and is counted again
+        self.cacheLocation = os.path.join(self.directory, PROJECT_CACHE_FILENAME)
+        self.lock = threading.Lock() # the saver's thread updates the cache right after writing a chapter
+        self.changed = False
+        try:
+            with open(self.cacheLocation, 'r', encoding=ENCODING) as file:
+                self.cache = json.load(file)
+            if not isinstance(self.cache, dict):
+                raise ValueError
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def key(self, chapter):
+        return os.path.relpath(chapter, self.directory) # relative, so the project can be moved somewhere else
+
+    def wordCount(self, chapter):
+        stat = os.stat(chapter)
+        with self.lock:
+            entry = self.cache.get(self.key(chapter))
+        if isinstance(entry, dict) and entry.get('mtime') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return entry['words']
+
+        with open(chapter, 'r', encoding=ENCODING) as file:
+            words = countWords(file.read())
+        self.store(chapter, stat, words)
+        return words
+
+    def remember(self, chapter, words):
+        # called on the saver's thread right after chapter was written with this many words in it, so it never has to be counted again
+        self.store(chapter, os.stat(chapter), words)
+
+    def store(self, chapter, stat, words):
+        with self.lock:
+            self.cache[self.key(chapter)] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'words': words}
+            self.changed = True
+
+    def saveCache(self):
+        with self.lock:
+            if not self.changed:
+                return
+            text = json.dumps(self.cache, indent=1)
+            self.changed = False
+        try:
+            writeFileAtomically(self.cacheLocation, text)
+        except OSError as exception:
+            print(f'Could not save the word counts of the project: {exception}') # not worth bothering you with, they're just counted again next time
 
-        self.fileLocation = fileLocation
+class Writer(): # a tkinter window for distraction-free writing
+    def __init__(self, blockStyle=1, blockValue=1, fileLocation='test.md', autosaveInterval=300, displayHeader=True, instrumentation='off', launchTime=None, project=None, dictionary='', virtual=False) -> None:
+
+        self.project = project # a Project, if you write in one; you start with its first chapter then
+        self.fileLocation = fileLocation if project is None else project.chapters[0]
+        self.chapterWords = {} # the word counts of the chapters saved in this session (the cache only gets them once they're written)
+        self.otherWords = 0 # the words in the project's other chapters
+        self.chapterStartWords = 0 # the words in the open chapter when it was loaded
+        self.earlierWords = 0 # the words written in chapters that were open before
+        self.goalReached = False
+        self.statistics = None # a SessionStatistics, once the session started (see run)
+        self.launchTime = launchTime if launchTime is not None else time.perf_counter() # to report how long it took until you could start writing
+        self.instrumentation = Instrumentation(instrumentation) # off by default; see INSTRUMENTATION_MODES
 
         if blockStyle == 1:
             self.blockSytle = 1 # blockSytle 1 blocks * until the given amount of time (blockValue in minutes) has passed
@@ -143,14 +2139,7 @@ class Writer(): # a tkinter window for distraction-free writing
         elif blockStyle == 2:
             self.blockSytle = 2 # blockSytle 2 blocks * until the given amount of words (blockValue) is written 
             self.blockValue = blockValue # words
-
-            # sets the progress value as (the amount of words of the unedited file (old words))
-            # every time the progressBar is updated it's current value is calculated as the here defined the current number of words (i.e. newly written words and old words) - progressValue
-            # as we only want the newly written words to count as progress and we can't really filter, if a word is new or old, to get the number of new words we just subtract the number of old words from the total
-            # if we otherwise open a file with already 1000 words inside, and set our blockValue as 1000 the goal would instantly be reached
-            file = open(self.fileLocation, 'r', encoding=ENCODING)
-            self.progressValue = len(re.sub(' +', ' ', file.read()).split(" "))
-            file.close()
+            self.progressValue = None # set to the amount of words in the file (or project) once it is loaded (see loadNextChunk)
         else:
             self.blockSytle = 0 # no blocking
 
@@ -187,71 +2176,827 @@ class Writer(): # a tkinter window for distraction-free writing
             self.label = tk.Label(self.root, text="So you are the kind of person to use a distraction-free writing software without using the features that make the software distraction-free? Interesting decision...\n...\n...\n...\n Just out of interest, you do realize that without the distraction-free features this piece of software is just barely, if at all, better than the MS Editor, do you?").pack(padx=20, pady=20)
 
         # the input box for your text, quite literally the most obvious (& important) part
-        self.textbox = BetterText(self.root, wrap='word', font=('Times New Roman', 16), width=90)
+        self.textbox = BetterText(self.root, wrap='word', font=('Times New Roman', 16), width=90, instrumentation=self.instrumentation, virtual=virtual)
         self.textbox.pack(fill=tk.Y, expand=True)
-        self.loadTextToTBox()
+        self.highlighter = MarkdownHighlighter(self.textbox) # only highlights what you can see and what you edit, so long texts don't slow typing down
+
+        # spell checking, if a word list is given (see README)
+        self.spellChecker = None
+        if dictionary:
+            try:
+                self.spellChecker = SpellChecker(self.textbox, loadDictionary(dictionary))
+            except (OSError, ValueError) as exception:
+                print(f'Could not load the word list "{dictionary}": {exception}')
+
+        # the outline of your headings: built while the file is loaded and kept up to date with every edit
+        self.headings = HeadingIndex(self.textbox)
+        self.headings.changeListeners.append(self.updateOutline)
+        self.outline = tk.Listbox(self.root, width=30, border=0, activestyle='none', exportselection=False) # only shown after pressing Ctrl+O
+        self.outline.bind('<<ListboxSelect>>', self.jumpToSelectedHeading)
+        self.textbox.bind('<Control-o>', self.toggleOutline)
+        self.textbox.bind('<Alt-Up>', self.jumpToPreviousHeading)
+        self.textbox.bind('<Alt-Down>', self.jumpToNextHeading)
+
+        # find & replace: the text is searched on a worker thread and the matches are highlighted as they come in
+        self.searcher = SearchWorker()
+        self.searchGeneration = None # the search whose results are shown
+        self.searchPoll = None
+        self.replacing = False # the running search computes the replacements for replace all
+        self.textbox.tag_configure('searchMatch', background='#ffe88a')
+        self.textbox.windowListeners.append(self.searchWindowChanged)
+        self.textbox.bind('<Control-f>', self.toggleSearchBar)
+
+        self.searchBar = tk.Frame(self.root) # only shown after pressing Ctrl+F
+        self.searchQuery = tk.StringVar()
+        self.replacement = tk.StringVar()
+        self.searchRegex = tk.IntVar()
+        tk.Label(self.searchBar, text='Find').pack(side=tk.LEFT)
+        self.searchEntry = tk.Entry(self.searchBar, textvariable=self.searchQuery)
+        self.searchEntry.pack(side=tk.LEFT, padx=5)
+        tk.Label(self.searchBar, text='Replace with').pack(side=tk.LEFT)
+        replaceEntry = tk.Entry(self.searchBar, textvariable=self.replacement)
+        replaceEntry.pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.searchBar, text='Regex', variable=self.searchRegex).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.searchBar, text='Next', command=self.findNext, border=0).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.searchBar, text='Replace', command=self.replaceOne, border=0).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.searchBar, text='Replace all', command=self.replaceAll, border=0).pack(side=tk.LEFT, padx=5)
+        self.searchLabel = tk.Label(self.searchBar, text='', fg='#888888')
+        self.searchLabel.pack(side=tk.LEFT, padx=5)
+        for entry in (self.searchEntry, replaceEntry):
+            entry.bind('<Return>', self.findNext)
+            entry.bind('<Escape>', self.toggleSearchBar)
+        self.searchQuery.trace_add('write', self.startSearch) # every change of the query cancels the search before
+        self.searchRegex.trace_add('write', self.startSearch)
+
+        # the chapters of your project; clicking one saves the current chapter and opens the other one
+        if self.project is not None:
+            self.chapterList = tk.Listbox(self.root, width=30, border=0, activestyle='none', exportselection=False)
+            for chapter in self.project.chapters:
+                self.chapterList.insert('end', os.path.basename(chapter))
+            self.chapterList.selection_set(0)
+            self.chapterList.bind('<<ListboxSelect>>', self.openSelectedChapter)
+            self.chapterList.pack(before=self.textbox, side=tk.RIGHT, fill=tk.Y, padx=(0, 20))
+
+        # a small line below the textbox telling you, when the text was saved last (or that saving failed)
+        self.statusLabel = tk.Label(self.root, text='', fg='#888888')
+        self.statusLabel.pack(pady=(0, 5))
+
+        self.saver = BackgroundSaver() # saving happens on a worker thread
+        self.lastSaveFailed = False
+        self.savedEditCount = 0 # textbox.editCount when the text was last handed to the saver; autosave skips saving, if nothing changed since
+
+        self.scheduler = TickScheduler(self.root, wrap=self.instrumentation.wrap) # runs everything that has to happen regularly (see run)
+
+        self.editJournal = EditJournal(self.fileLocation) # every edit is written here right away and removed again once it is saved
+        self.history = VersionHistory(self.fileLocation)
+        self.textbox.bind('<Control-h>', self.showHistory)
+
+        # repetitions: highlighted in the text, and the most frequent words in a panel on the right (Ctrl+R)
+        self.repetitions = None
+        self.shownFrequencies = None
+        self.frequencyEditCount = None # the textbox's editCount the panel was last updated at
+        self.frequencyPanel = tk.Listbox(self.root, width=20, border=0, activestyle='none', takefocus=0)
+        self.textbox.bind('<Control-r>', self.toggleRepetitions)
+        self.loaded = False # nothing is saved or counted, until the whole file is in the textbox
+        self.loadFailed = False # then there is nothing to save, but you can still exit
+        self.loadTextToTBox() # reportStartup is called once the whole file is loaded and you can type
 
         self.run()
 
+    def reportStartup(self, event=None):
+        # the time from launching until the text can be edited and is on screen; only the first file counts (not chapters opened later)
+        if self.launchTime is None:
+            return
+        if not self.textbox.winfo_viewable():
+            self.textbox.bind('<Visibility>', self.reportStartup) # the window isn't shown yet
+            return
+        self.textbox.update_idletasks() # draws the text, if tk hasn't done so yet
+        startupTime = time.perf_counter() - self.launchTime
+        self.launchTime = None
+        print(f'Ready to write after {startupTime * 1000:.0f} ms.')
+        self.instrumentation.record('startup (launch -> first editable frame)', startupTime)
+
+    def after(self, ms, callback, *args):
+        # root.after, but the callback is measured by the instrumentation (if it is switched on)
+        return self.root.after(ms, self.instrumentation.wrap(callback.__name__, callback), *args)
+
     def saveTextToFile(self):
-        # gets the text from the textbox and saves it to the previously specified file
-        file = open(self.fileLocation, 'w', encoding=ENCODING)
-        file.write(self.textbox.get('1.0','end'))
-        file.close()
+        # gets the text from the textbox and hands it to the saver, which writes it to the previously specified file in the background
+        # the snapshot is just the list of the document's pieces (no copying of the text itself), so it stays cheap for huge files
+        self.textbox.add_changes() # the journal has to have every edit up to now before it is rotated
+        self.savedEditCount = self.textbox.editCount
+        text = self.textbox.document.pieces()
+        journal, fileLocation = self.editJournal, self.fileLocation # another chapter might be open by the time the text is written
+        generation = journal.rotate() # the edits up to now are part of text, so their journal can go once text is written
+
+        history, project, words = self.history, self.project, self.textbox.wordCount()
+        if project is not None:
+            self.chapterWords[fileLocation] = words
+        def afterWrite():
+            journal.removeGenerations(generation)
+            if project is not None:
+                project.remember(fileLocation, words)
+            try:
+                history.addVersion(''.join(text), words) # every save is kept as a version (see showHistory)
+            except Exception as exception:
+                print(f'Could not add a version to the history of "{fileLocation}": {exception}') # the text itself is saved, so this isn't reported as a failed save
+        self.saver.save(fileLocation, text, afterWrite=afterWrite)
+        self.after(SAVE_POLL_INTERVAL, self.checkSaveResults)
+
+    def checkSaveResults(self):
+        # reports finished saves; keeps checking while a save is still on its way
+        for fileLocation, duration, exception in self.saver.finishedSaves():
+            self.instrumentation.recordSave(duration, exception)
+            if exception is None:
+                print(f'Saved "{fileLocation}" ({duration * 1000:.0f} ms).')
+                self.statusLabel.config(text=f'Saved at {time.strftime("%H:%M")} ({duration * 1000:.0f} ms)', fg='#888888')
+            else:
+                print(f'Saving "{fileLocation}" failed: {exception}')
+                self.statusLabel.config(text=f'Saving failed: {exception}', fg='#ff3333')
+            self.lastSaveFailed = exception is not None
+
+        if self.saver.pending():
+            self.after(SAVE_POLL_INTERVAL, self.checkSaveResults)
 
     def loadTextToTBox(self):
-        # loads the text from the previously specified file to the textbox
-        file = open(self.fileLocation, 'r', encoding=ENCODING)
-        self.textbox.insert('1.0', file.read())
+        # streams the text from the previously specified file into the textbox, one chunk at a time
+        # the window shows up (and can be scrolled) right away instead of staying blank until a huge file is read completely
+        try:
+            file = open(self.fileLocation, 'r', encoding=ENCODING)
+        except OSError as exception:
+            self.loadingFailed(exception)
+            return
+        self.textbox.recording = False # loading the file isn't something you should be able to undo
+        self.textbox.config(state='disabled') # typing in between the chunks would mix your text with the file's
+        self.loadNextChunk(file)
+
+    def loadingFailed(self, exception):
+        # loaded stays False, so the half loaded text is never saved over your file; the quit button is enabled, as the goal can't be reached without the text
+        print(f'Loading "{self.fileLocation}" failed: {exception}')
+        self.statusLabel.config(text=f'Loading failed: {exception} (your file was left as it is)', fg='#ff3333')
+        self.chapterStartWords = self.textbox.wordCount() # the half loaded words weren't written in this session
+        self.loadFailed = True
+        if self.blockSytle != 0: # otherwise the window can be closed anyway
+            self.quitButton.config(text='Exit', state='normal')
+
+    def loadNextChunk(self, file):
+        try:
+            chunk = file.read(LOAD_CHUNK_SIZE)
+        except (OSError, UnicodeDecodeError) as exception:
+            file.close()
+            self.loadingFailed(exception)
+            return
+
+        if chunk and self.textbox.virtual:
+            self.textbox.appendText(chunk) # only the first lines end up in the widget
+            self.after(1, self.loadNextChunk, file)
+            return
+        if chunk:
+            self.textbox.config(state='normal')
+            self.textbox.insert('end', chunk) # the textbox counts the words of every chunk while inserting it
+            self.textbox.config(state='disabled')
+            self.after(1, self.loadNextChunk, file) # gives tk the chance to draw and handle events before the next chunk
+            return
+
         file.close()
+        self.textbox.config(state='normal')
+        self.textbox.recording = True
 
-    def autoSave(self):
-        print('Trying to autosave...')
+        if self.project is not None and self.blockSytle == 2:
+            # the other chapters are only counted, if they changed since they were counted last
+            self.otherWords = sum(self.chapterWords[chapter] if chapter in self.chapterWords else self.project.wordCount(chapter) for chapter in self.project.chapters if chapter != self.fileLocation)
+
+        self.recoverFromJournal() # before the baseline is taken: the recovered edits were written in the last session, not this one
+
+        if self.blockSytle == 2 and self.progressValue is None:
+            # sets the progress value as (the amount of words of the unedited file (old words))
+            # every time the progressBar is updated it's current value is calculated as the current number of words (i.e. newly written words and old words) - progressValue
+            # as we only want the newly written words to count as progress and we can't really filter, if a word is new or old, to get the number of new words we just subtract the number of old words from the total
+            # if we otherwise open a file with already 1000 words inside, and set our blockValue as 1000 the goal would instantly be reached
+            # the textbox counted the words while the chunks were inserted, so the file doesn't have to be read or counted a second time
+            # in a project the words of all chapters count, and the baseline is only set for the first chapter you open
+            self.progressValue = self.otherWords + self.textbox.wordCount()
+
+        self.chapterStartWords = self.textbox.wordCount() # so neither the goal nor the statistics count the recovered edits
+        self.textbox.editListeners.append(self.editJournal.record)
+        self.textbox.editListeners.append(self.scheduler.activity)
+        self.savedEditCount = self.textbox.editCount
+        self.loaded = True
+        self.reportStartup()
+
+    def recoverFromJournal(self):
+        # if the last session crashed, its journal still contains every edit made since its last save; those are redone here
+        deltas = EditJournal.readDeltas(self.fileLocation)
+        if not deltas:
+            return
+
+        self.textbox.recording = False
+        recovered = 0
+        for delta in deltas:
+            start = self.textbox.document.offset(delta.index)
+            if delta.kind == 'delete' and self.textbox.document.slice(start, start + len(delta.text)) != delta.text:
+                break # the journal doesn't fit the file (e.g. the file was edited elsewhere); better stop than garble the text
+            self.textbox.applyDeltas([delta])
+            recovered += 1
+        self.textbox.recording = True
+
+        print(f'Recovered {recovered} of {len(deltas)} edits from a previous session that ended unexpectedly.')
+        self.statusLabel.config(text=f'Recovered {recovered} unsaved edits from your last session.', fg='#888888')
+        self.saveTextToFile() # writes the recovered text to the file, which also removes the old journals
+
+    def flushJournal(self, missed=1):
+        self.textbox.add_changes()
+        self.editJournal.flush()
+
+    def autoSave(self, missed=1):
+        # a missed autosave is only done once, not once for every interval missed
+        if not self.loaded: # saving now would overwrite your file with only a part of it
+            return
+        if self.textbox.editCount == self.savedEditCount: # nothing to save, the file is up to date
+            return
+
+        print('Trying to autosave...') # whether it worked is reported by checkSaveResults
         try:
             self.saveTextToFile()
         except:
             print('Autosave failed.')
-        else:
-            print('Autosave finished.')
-        finally:
-            self.root.after(self.autosaveInterval, self.autoSave)
 
     def run(self):
-        if self.blockSytle == 1: self.root.after(1000, self.updateTimeBar)
-        elif self.blockSytle == 2: self.root.after(1000, self.updateWordBar)
-        self.root.after(self.autosaveInterval, self.autoSave)
+        # everything periodic runs on the scheduler's single timer; while you're idle the progressBar, the journal and the autosave wake up less often
+        self.startTime = time.monotonic()
+        if self.blockSytle == 1: self.scheduler.add(self.updateTimeBar, PROGRESS_INTERVAL, IDLE_PROGRESS_INTERVAL)
+        elif self.blockSytle == 2: self.scheduler.add(self.updateWordBar, PROGRESS_INTERVAL, IDLE_PROGRESS_INTERVAL)
+        self.scheduler.add(self.autoSave, self.autosaveInterval / 1000)
+        self.scheduler.add(self.flushJournal, JOURNAL_FLUSH_INTERVAL, IDLE_PROGRESS_INTERVAL)
+        self.scheduler.add(self.updateFrequencyPanel, PROGRESS_INTERVAL, IDLE_PROGRESS_INTERVAL)
+        self.startSession()
+        self.scheduler.start()
+        self.instrumentation.startStallProbe(self.root)
+        self.instrumentation.startKeyProbe(self.textbox)
         self.root.mainloop()
 
-    def updateTimeBar(self):
-        self.progressValue += 1
+    def startSession(self):
+        # statistics are nice to have, but they should never keep you from writing
+        try:
+            self.statistics = SessionStatistics()
+            self.statistics.startSession(self.fileLocation if self.project is None else self.project.directory, self.blockSytle, getattr(self, 'blockValue', 0))
+        except Exception as exception:
+            print(f'Could not record statistics for this session: {exception}')
+            self.statistics = None
+            return
+        self.lastSample = (0, 0) # (seconds, words)
+        self.scheduler.add(self.recordSample, STATISTICS_SAMPLE_INTERVAL)
+
+    def wordsWritten(self):
+        # the words written in this session (which are fewer than before, if you deleted more than you wrote)
+        return self.earlierWords + self.textbox.wordCount() - self.chapterStartWords
+
+    def recordSample(self, missed=1):
+        if self.statistics is None:
+            return
+        if not self.loaded:
+            try:
+                self.statistics.alive()
+            except Exception as exception:
+                print(f'Could not record statistics for this session: {exception}')
+            return
+        seconds, words = time.monotonic() - self.startTime, self.wordsWritten()
+        wordsPerMinute = (words - self.lastSample[1]) / ((seconds - self.lastSample[0]) / 60)
+        self.lastSample = (seconds, words)
+        try:
+            self.statistics.sample(seconds, words, wordsPerMinute)
+        except Exception as exception:
+            print(f'Could not record statistics for this session: {exception}')
+
+    def updateTimeBar(self, missed=1):
+        # the seconds passed are measured, not counted, so a busy mainloop can't make the goal take longer than you set it
+        self.progressValue = time.monotonic() - self.startTime
         value = ((self.progressValue/60)/self.blockValue)
         self.progressBar.config(value= value)
 
         if value >= 1.0: self.enableQuit() # enable the quit button when goal is reached 
 
-        self.root.after(1000, self.updateTimeBar) # recall method in a sec
+    def updateWordBar(self, missed=1):
+        if not self.loaded: # the baseline isn't known yet
+            return
 
-    def updateWordBar(self):
-        wordCount = len(re.sub(' +', ' ',self.textbox.get('1.0','end')).strip().split(" "))
+        wordCount = self.otherWords + self.textbox.wordCount() # kept up to date by the textbox itself, so this doesn't depend on the length of the text
         value = ((wordCount - self.progressValue)/self.blockValue)
         self.progressBar.config(value= value)
 
         if value >= 1.0: self.enableQuit() # enable the quit button when goal is reached 
 
-        self.root.after(1000, self.updateWordBar) # recall method after a sec
-
     def SaveAndExit(self):
-        self.saveTextToFile()
+        if not self.loaded and not self.loadFailed:
+            return
+
+        if self.loaded: # if loading failed, there's nothing to save (and the file mustn't be overwritten)
+            self.saveTextToFile()
+            self.saver.wait() # waits for this (and any autosave still running) to be written
+            self.checkSaveResults()
+            if self.lastSaveFailed:
+                return # better to stay open than to lose the text; the statusLabel tells what went wrong
+
+        self.scheduler.stop()
+        self.instrumentation.stopStallProbe(self.root)
+        self.editJournal.close()
+        self.saver.close()
+        self.searcher.close()
+        if self.project is not None:
+            self.project.saveCache()
+        if self.statistics is not None:
+            try:
+                self.statistics.finishSession(time.monotonic() - self.startTime, self.wordsWritten(), self.goalReached)
+                self.statistics.close()
+            except Exception as exception:
+                print(f'Could not record statistics for this session: {exception}')
+        self.instrumentation.dump(self.fileLocation)
         self.root.destroy()
 
     def enableQuit(self):
+        self.goalReached = True
         self.quitButton.config(state= 'normal')
 
+    def openSelectedChapter(self, event=None):
+        selection = self.chapterList.curselection()
+        if selection:
+            self.openChapter(self.project.chapters[selection[0]])
+
+    def openChapter(self, chapter):
+        if not self.loaded or chapter == self.fileLocation:
+            if not self.loaded: # can't switch while a chapter is still loading
+                self.chapterList.selection_clear(0, 'end')
+                self.chapterList.selection_set(self.project.chapters.index(self.fileLocation))
+            return
+
+        # saves the current chapter in the background and puts away its journal
+        self.textbox.add_changes()
+        if self.textbox.editCount != self.savedEditCount:
+            self.saveTextToFile()
+        self.textbox.editListeners.remove(self.editJournal.record)
+        self.textbox.editListeners.remove(self.scheduler.activity)
+        self.editJournal.close()
+        self.project.saveCache()
+
+        # the textbox is emptied and the other chapter is loaded into it, just like a file when you start
+        self.earlierWords += self.textbox.wordCount() - self.chapterStartWords
+        self.loaded = False
+        self.textbox.recording = False
+        self.textbox.clear()
+        self.textbox.resetHistory() # the undo steps belong to the other chapter
+        self.fileLocation = chapter
+        self.root.title('A_WritingProgram - ' + self.fileLocation)
+        self.editJournal = EditJournal(self.fileLocation)
+        self.history = VersionHistory(self.fileLocation)
+        self.loadTextToTBox()
+
+    def toggleSearchBar(self, event=None):
+        if self.searchBar.winfo_ismapped():
+            self.searchBar.pack_forget()
+            self.searcher.cancel()
+            self.searchGeneration = None
+            self.textbox.tag_remove('searchMatch', '1.0', 'end')
+            self.textbox.focus_set()
+        else:
+            self.searchBar.pack(before=self.statusLabel, pady=(0, 5))
+            self.searchEntry.focus_set()
+            self.searchEntry.select_range(0, 'end')
+            self.startSearch()
+        return 'break'
+
+    def startSearch(self, *args):
+        # searches a snapshot of the text; the matches are highlighted by checkSearchResults as they come in
+        self.textbox.tag_remove('searchMatch', '1.0', 'end')
+        self.replacing = False
+        query = self.searchQuery.get()
+        if not query:
+            self.searcher.cancel()
+            self.searchGeneration = None
+            self.searchLabel.config(text='', fg='#888888')
+            return
+
+        self.searchEditCount = self.textbox.editCount
+        self.searchGeneration = self.searcher.search(self.textbox.document.pieces(), query, bool(self.searchRegex.get()))
+        self.searchLabel.config(text='Searching...', fg='#888888')
+        if self.searchPoll is None:
+            self.searchPoll = self.after(SEARCH_POLL_INTERVAL, self.checkSearchResults)
+
+    def checkSearchResults(self):
+        self.searchPoll = None
+        if self.searchGeneration is None:
+            return
+        if self.textbox.editCount != self.searchEditCount:
+            # the offsets of the matches don't fit the text anymore
+            if self.replacing:
+                self.replaceAll()
+            else:
+                self.startSearch()
+            return
+
+        for kind, data in self.searcher.finishedResults(self.searchGeneration, SEARCH_BATCHES_PER_POLL):
+            if kind == 'matches' and self.replacing:
+                self.replacements.extend(data)
+            elif kind == 'matches' and data:
+                ranges = []
+                for start, end in data:
+                    ranges += [self.textbox.document.index(start), self.textbox.document.index(end)]
+                if self.textbox.virtual:
+                    # only the matches in the lines that are in the widget right now can be highlighted
+                    ranges = [self.textbox.widgetIndex(index) for index in ranges]
+                    ranges = [index for pair in zip(ranges[::2], ranges[1::2]) if None not in pair for index in pair]
+                if ranges:
+                    self.textbox.tag_add('searchMatch', *ranges)
+            elif kind == 'done' and self.replacing:
+                self.textbox.replaceRanges(self.replacements)
+                self.replacing = False
+                self.searchGeneration = None
+                self.searchLabel.config(text=f'Replaced {data} matches.', fg='#888888')
+                return
+            elif kind == 'done':
+                self.searchGeneration = None
+                self.searchLabel.config(text=f'{data} matches' if data != 1 else '1 match', fg='#888888')
+                return
+            elif kind == 'error':
+                self.searchGeneration = None
+                self.searchLabel.config(text=f'Invalid regex: {data}', fg='#ff3333')
+                return
+
+        self.searchPoll = self.after(SEARCH_POLL_INTERVAL, self.checkSearchResults)
+
+    def searchWindowChanged(self):
+        # editing virtually, swapping other lines into the textbox drops the highlighted matches; searching again highlights the ones in the new lines
+        if self.searchBar.winfo_ismapped() and not self.replacing:
+            self.startSearch()
+
+    def searchPattern(self):
+        # the search (as a compiled regex) or None, if it's empty or invalid
+        query = self.searchQuery.get()
+        if not query:
+            return None
+        try:
+            return re.compile(query if self.searchRegex.get() else re.escape(query), re.MULTILINE)
+        except re.error:
+            return None # the search itself tells what's wrong with it
+
+    def findNext(self, event=None):
+        # selects the next match behind the cursor (starting at the top again, once the end is reached)
+        if self.textbox.virtual:
+            match = self.nextMatchInDocument()
+        else:
+            match = self.textbox.tag_nextrange('searchMatch', 'insert') or self.textbox.tag_nextrange('searchMatch', '1.0')
+        if match:
+            self.textbox.tag_remove('sel', '1.0', 'end')
+            self.textbox.tag_add('sel', *match)
+            self.textbox.mark_set('insert', match[1])
+            self.textbox.see('insert')
+        return 'break'
+
+    def nextMatchInDocument(self):
+        # editing virtually, only the matches in the lines in the textbox are highlighted, so the next one is looked for in the document
+        # returns the widget indices of the match (its lines are swapped in first) or None
+        pattern = self.searchPattern()
+        if pattern is None:
+            return None
+        document = self.textbox.document
+        text = document.text()
+        cursor = document.offset(self.textbox.documentIndex(self.textbox.index('insert')))
+        match = next((match for match in pattern.finditer(text, cursor) if match.end() > match.start()), None)
+        if match is None:
+            match = next((match for match in pattern.finditer(text) if match.end() > match.start()), None)
+        if match is None:
+            return None
+        start = self.textbox.showIndex(document.index(match.start()))
+        return (start, self.textbox.widgetIndex(document.index(match.end())) or self.textbox.index('end - 1 chars'))
+
+    def replaceOne(self):
+        # replaces the selected match and selects the next one
+        selection = self.textbox.tag_ranges('sel')
+        if not selection or (not self.textbox.virtual and tuple(map(str, self.textbox.tag_nextrange('searchMatch', selection[0]))) != tuple(map(str, selection))):
+            self.findNext()
+            return
+
+        replacement = self.replacement.get()
+        if self.searchRegex.get() or self.textbox.virtual:
+            # matched again at the same place in the whole text, so lookarounds, \b and ^/$ see the same context as the search did
+            # (editing virtually, this is also what tells whether the selection is a match, as its highlight might not be back yet)
+            document = self.textbox.document
+            start = document.offset(self.textbox.documentIndex(selection[0]))
+            end = document.offset(self.textbox.documentIndex(selection[1]))
+            pattern = self.searchPattern()
+            match = pattern.match(document.text(), start) if pattern is not None else None
+            if match is None or match.end() != end: # the text changed since it was searched
+                self.findNext()
+                return
+            if self.searchRegex.get():
+                try:
+                    replacement = match.expand(replacement)
+                except (re.error, IndexError) as exception:
+                    self.searchLabel.config(text=f'Invalid replacement: {exception}', fg='#ff3333')
+                    return
+        self.textbox.replace(selection[0], selection[1], replacement)
+        self.findNext()
+
+    def replaceAll(self):
+        # the replacements are worked out on the search thread and then done in one go, which can be undone in one step
+        query = self.searchQuery.get()
+        if not query:
+            return
+        self.textbox.tag_remove('searchMatch', '1.0', 'end')
+        self.replacing = True
+        self.replacements = []
+        self.searchEditCount = self.textbox.editCount
+        self.searchGeneration = self.searcher.search(self.textbox.document.pieces(), query, bool(self.searchRegex.get()), self.replacement.get())
+        self.searchLabel.config(text='Replacing...', fg='#888888')
+        if self.searchPoll is None:
+            self.searchPoll = self.after(SEARCH_POLL_INTERVAL, self.checkSearchResults)
+
+    def showHistory(self, event=None):
+        # a window listing every saved version; selecting one shows how it differs from your text, and it can be restored (which can be undone)
+        window = tk.Toplevel(self.root)
+        window.title('History - ' + self.fileLocation)
+        window.attributes('-topmost', True) # the writer itself might be on top of everything
+        history = self.history
+        versions = history.allVersions()
+
+        versionList = tk.Listbox(window, width=30, border=0, activestyle='none', exportselection=False)
+        for savedAt, words in reversed(versions): # newest first
+            versionList.insert('end', f'{time.strftime("%Y-%m-%d %H:%M", time.localtime(savedAt))} ({words} words)')
+        versionList.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+
+        diffText = tk.Text(window, wrap='word', width=80, height=30, border=0)
+        diffText.tag_configure('+', foreground='#228822')
+        diffText.tag_configure('-', foreground='#cc3333')
+        diffText.tag_configure('@', foreground='#888888')
+        diffText.pack(fill=tk.BOTH, expand=True, padx=(0, 10), pady=(10, 0))
+
+        def selectedVersion():
+            selection = versionList.curselection()
+            return len(versions) - 1 - selection[0] if selection else None
+
+        def showDiff(event=None):
+            number = selectedVersion()
+            if number is None:
+                return
+            diffText.delete('1.0', 'end')
+            lines = history.diff(number, self.textbox.text())
+            if not lines:
+                diffText.insert('end', 'This version is the same as your text.', '@')
+            for kind, line in lines:
+                diffText.insert('end', (f'@@ {line} @@' if kind == '@' else f'{kind} {line}') + '\n', kind)
+
+        def restore():
+            number = selectedVersion()
+            if number is None or not self.loaded:
+                return
+            self.textbox.replaceRanges([(0, len(self.textbox.document), history.text(number))]) # a single undo step, in case you change your mind
+            window.destroy()
+
+        versionList.bind('<<ListboxSelect>>', showDiff)
+        tk.Button(window, text='Restore this version', command=restore, border=0).pack(pady=10)
+        if not versions:
+            diffText.insert('end', 'No versions yet; every time the text is saved, a version is kept.', '@')
+        return 'break'
+
+    def toggleRepetitions(self, event=None):
+        if self.repetitions is not None:
+            self.repetitions.stop('repeated')
+            self.repetitions = None
+            self.textbox.wordFrequencies = None # no need to keep counting
+            self.frequencyPanel.pack_forget()
+        else:
+            self.textbox.wordFrequencies = WordFrequencies(self.textbox.text()) # counted once; from now on only the edits are
+            self.repetitions = RepetitionHighlighter(self.textbox)
+            self.frequencyPanel.pack(before=self.textbox, side=tk.RIGHT, fill=tk.Y, padx=(0, 20))
+            self.shownFrequencies = None
+            self.frequencyEditCount = None
+            self.updateFrequencyPanel()
+        return 'break'
+
+    def updateFrequencyPanel(self, missed=1):
+        frequencies = self.textbox.wordFrequencies
+        if frequencies is None or self.textbox.editCount == self.frequencyEditCount:
+            return # finding the most common words goes through all of them, which isn't worth it, if nothing was written
+        self.frequencyEditCount = self.textbox.editCount
+        mostCommon = frequencies.mostCommon()
+        if mostCommon == self.shownFrequencies:
+            return
+        self.shownFrequencies = mostCommon
+        self.frequencyPanel.delete(0, 'end')
+        for count, word in mostCommon:
+            self.frequencyPanel.insert('end', f'{count:>6}  {word}')
+
+    def toggleOutline(self, event=None):
+        if self.outline.winfo_ismapped():
+            self.outline.pack_forget()
+        else:
+            self.outline.pack(before=self.textbox, side=tk.LEFT, fill=tk.Y, padx=(20, 0))
+            self.updateOutline()
+        return 'break' # otherwise tk inserts a newline
+
+    def updateOutline(self):
+        if not self.outline.winfo_ismapped():
+            return # it's filled once it is shown
+        self.outline.delete(0, 'end')
+        for level, title in self.headings.headings:
+            self.outline.insert('end', '    ' * (level - 1) + title)
+
+    def jumpToHeading(self, line):
+        if line is None:
+            return
+        self.textbox.mark_set('insert', self.textbox.showIndex(f'{line}.0')) # the heading's line might not be in the widget, when editing virtually
+        self.textbox.see('insert')
+        self.textbox.focus_set()
+
+    def jumpToSelectedHeading(self, event=None):
+        selection = self.outline.curselection()
+        if selection and selection[0] < len(self.headings.lines):
+            self.jumpToHeading(self.headings.lines[selection[0]])
+
+    def jumpToPreviousHeading(self, event=None):
+        line = int(self.textbox.documentIndex(self.textbox.index('insert')).split('.')[0])
+        self.jumpToHeading(self.headings.previous(line))
+        return 'break'
+
+    def jumpToNextHeading(self, event=None):
+        line = int(self.textbox.documentIndex(self.textbox.index('insert')).split('.')[0])
+        self.jumpToHeading(self.headings.next(line))
+        return 'break'
+
+def exportFormat(target):
+    # the format is taken from the file extension
+    extension = os.path.splitext(target)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f'"{target}" has to end in {", ".join(EXPORT_FORMATS)}')
+    return EXPORT_FORMATS[extension]
+
+def markdownBlocks(lines):
+    # groups the lines of a markdown text into blocks: yields (kind, lines) one block at a time, so a text never has to be read as a whole
+    block, kind = [], None
+    for line in lines:
+        line = line.rstrip('\n')
+        if kind == 'code':
+            if line.startswith('```'):
+                yield ('code', block)
+                block, kind = [], None
+            else:
+                block.append(line)
+            continue
+
+        if line.startswith('```') or not line.strip() or MARKDOWN_HEADING.match(line) or EXPORT_RULE.match(line):
+            if block:
+                yield (kind, block)
+            block, kind = [], None
+            if line.startswith('```'):
+                kind = 'code'
+            elif MARKDOWN_HEADING.match(line):
+                yield ('heading', [line])
+            elif line.strip():
+                yield ('rule', [line])
+            continue
+
+        lineKind = 'quote' if line.lstrip().startswith('>') else 'list' if EXPORT_LIST_ITEM.match(line) else 'paragraph'
+        if block and lineKind != kind and not (lineKind == 'paragraph' and kind in ('quote', 'list')): # lines without a marker continue a quote or list item
+            yield (kind, block)
+            block = []
+        if not block:
+            kind = lineKind
+        block.append(line)
+    if block:
+        yield (kind, block)
+
+def exportInline(text, format):
+    # converts the markdown inside a line (bold, italic, underlined, code and links)
+    import html
+
+    def plain(text):
+        text = EXPORT_ESCAPED.sub(r'\1', text)
+        return html.escape(text, quote=False) if format == 'html' else text
+
+    parts, position = [], 0
+    for match in EXPORT_INLINE.finditer(text):
+        parts.append(plain(text[position:match.start()]))
+        position = match.end()
+        code, linkText, url, bold, italic, underlined = match.groups()
+        if code is not None:
+            parts.append(f'<code>{html.escape(code, quote=False)}</code>' if format == 'html' else code)
+        elif linkText is not None:
+            parts.append(f'<a href="{html.escape(url)}">{exportInline(linkText, format)}</a>' if format == 'html' else f'{exportInline(linkText, format)} ({url})')
+        else:
+            tag, inner = ('strong', bold) if bold is not None else ('em', italic) if italic is not None else ('u', underlined)
+            parts.append(f'<{tag}>{exportInline(inner, format)}</{tag}>' if format == 'html' else exportInline(inner, format))
+    parts.append(plain(text[position:]))
+    return ''.join(parts)
+
+def exportBlock(kind, lines, format):
+    # a block of markdownBlocks as html or plain text
+    import html
+
+    if kind == 'heading':
+        heading = MARKDOWN_HEADING.match(lines[0])
+        level, title = len(heading.group(1)), exportInline(lines[0][heading.end():].strip().rstrip('#').strip(), format)
+        return f'<h{level}>{title}</h{level}>\n' if format == 'html' else f'{title}\n\n'
+    if kind == 'rule':
+        return '<hr>\n' if format == 'html' else '* * *\n\n'
+    if kind == 'code':
+        code = '\n'.join(lines)
+        return f'<pre><code>{html.escape(code, quote=False)}</code></pre>\n' if format == 'html' else f'{code}\n\n'
+    if kind == 'quote':
+        inner = [re.sub(r'^\s*> ?', '', line) for line in lines]
+        converted = ''.join(exportBlock(innerKind, innerLines, format) for innerKind, innerLines in markdownBlocks(inner))
+        return f'<blockquote>\n{converted}</blockquote>\n' if format == 'html' else ''.join(f'    {line}\n' if line else '\n' for line in converted.rstrip('\n').split('\n')) + '\n'
+    if kind == 'list':
+        items = []
+        for line in lines:
+            if EXPORT_LIST_ITEM.match(line) or not items:
+                items.append([line])
+            else:
+                items[-1].append(line.strip())
+        ordered = EXPORT_LIST_ITEM.match(lines[0]).group(1)[0].isdigit()
+        if format == 'html':
+            tag = 'ol' if ordered else 'ul'
+            return f'<{tag}>\n' + ''.join(f'<li>{exportInline(EXPORT_LIST_ITEM.sub("", " ".join(item), count=1), format)}</li>\n' for item in items) + f'</{tag}>\n'
+        return ''.join(f'{f"{number}." if ordered else "-"} {exportInline(EXPORT_LIST_ITEM.sub("", " ".join(item), count=1), format)}\n' for number, item in enumerate(items, 1)) + '\n'
+    paragraph = '\n'.join(exportInline(line.strip(), format) for line in lines)
+    return f'<p>{paragraph}</p>\n' if format == 'html' else f'{paragraph}\n\n'
+
+def exportChapter(source, target, format):
+    # converts one markdown file block by block (the whole pipeline runs on generators, so only a single block is ever in memory)
+    # a function on module level, so it can run in the worker processes of exportManuscript
+    with open(source, 'r', encoding=ENCODING) as sourceFile, open(target, 'w', encoding=ENCODING) as targetFile:
+        for kind, lines in markdownBlocks(sourceFile):
+            targetFile.write(exportBlock(kind, lines, format))
+
+def exportManuscript(sources, target, format=None, processes=None):
+    # exports one or more markdown files (e.g. the chapters of a Project) into a single file
+    # the chapters are converted in parallel into temporary parts, which are then streamed into target one after the other
+    import html
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor # only needed when exporting
+
+    format = format or exportFormat(target)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(target))) as directory:
+        parts = [os.path.join(directory, f'{number}.part') for number in range(len(sources))]
+        if len(sources) == 1:
+            exportChapter(sources[0], parts[0], format) # not worth starting a process for
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                for _ in pool.map(exportChapter, sources, parts, [format] * len(sources)):
+                    pass
+
+        def pieces():
+            if format == 'html':
+                title = html.escape(os.path.splitext(os.path.basename(target))[0])
+                yield f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n</head>\n<body>\n'
+            for part in parts:
+                with open(part, 'r', encoding=ENCODING) as file:
+                    while True:
+                        chunk = file.read(LOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+            if format == 'html':
+                yield '</body>\n</html>\n'
+        writeFileAtomically(target, pieces())
+    return len(sources)
+
+def readSettings():
+    # returns the settings from SETTINGS_FILENAME (or the default settings) and a message, if the file couldn't be used
+    settings = dict(DEFAULT_SETTINGS)
+
+    # I'm a bit more caucious than usually
+    if not os.path.exists(SETTINGS_FILENAME):
+        return (settings, 'No settings found, loading default settings.')
+
+    try:
+        file = open(SETTINGS_FILENAME, 'r')
+    except:
+        return (settings, f'Could not open "{SETTINGS_FILENAME}"; loading default settings.')
+
+    try:
+        loaded = json.load(file)
+    except:
+        return (settings, f'Could not load "{SETTINGS_FILENAME}"; loading default settings instead.')
+    finally:
+        file.close()
+
+    try:
+        autosaveInterval = int(loaded["autosaveInterval"])
+        if autosaveInterval <= 0:
+            raise ValueError
+        settings["autosaveInterval"] = autosaveInterval
+        settings["displayHeader"] = bool(loaded["displayHeader"])
+        settings["instrumentation"] = loaded.get("instrumentation", 'off') # optional, only set by editing the file
+        settings["dictionary"] = str(loaded.get("dictionary", '')) # optional as well
+        settings["virtualEditing"] = bool(loaded.get("virtualEditing", False)) # optional as well
+    except:
+        return (dict(DEFAULT_SETTINGS), f'"{SETTINGS_FILENAME}" seems to be not initialized correctly; loading default settings instead.')
+    return (settings, None)
+
 class WriterConfigurator():
     def __init__(self) -> None:
         self.root = tk.Tk()
         self.root.title('A_WritingProgram')
-        self.root.geometry('525x275')
+        self.root.geometry('600x275')
         self.root.resizable(0, 0)
 
         self.tabControl = ttk.Notebook(self.root)
@@ -259,6 +3004,8 @@ class WriterConfigurator():
         self.tabControl.add(self.mainTab, text='Main')
         self.settingsTab = ttk.Frame(self.tabControl)
         self.tabControl.add(self.settingsTab, text='Settings')
+        self.statisticsTab = ttk.Frame(self.tabControl)
+        self.tabControl.add(self.statisticsTab, text='Statistics')
         self.aboutTab = ttk.Frame(self.tabControl)
         self.tabControl.add(self.aboutTab, text='About')
         self.tabControl.pack(expand = 1, fill ="both") 
@@ -274,6 +3021,9 @@ class WriterConfigurator():
         selectFileButton = tk.Button(fileFrame, text='Browse', command= self.selectFile)
         selectFileButton.pack(pady=20, side='left')
 
+        selectProjectButton = tk.Button(fileFrame, text='Project', command= self.selectProject)
+        selectProjectButton.pack(padx=(5, 0), pady=20, side='left')
+
         fileFrame.pack()
         ###
 
@@ -307,12 +3057,35 @@ class WriterConfigurator():
 
         checkBoxFrame.pack()
 
-        startButton = tk.Button(self.mainTab, text='Start', command= self.startWriter)
-        startButton.pack(pady=20)
+        buttonFrame = tk.Frame(self.mainTab)
+        startButton = tk.Button(buttonFrame, text='Start', command= self.startWriter)
+        startButton.pack(side='left', padx=10)
+        exportButton = tk.Button(buttonFrame, text='Export', command= self.exportFile)
+        exportButton.pack(side='left', padx=10)
+        buttonFrame.pack(pady=20)
+
+        # the settings are read right away (they are needed to start the Writer), but their tab is only built once it's opened
+        self.builtTabs = {self.mainTab}
+        self.tabControl.bind('<<NotebookTabChanged>>', self.buildTab)
+        self.loadSettingsFromFile()
+
+        self.root.mainloop()
 
-        ######
-        # Settings Tab
+    def buildTab(self, event=None):
+        # the Settings and About tabs are only built once they're opened for the first time, so the window shows up faster
+        tab = self.tabControl.nametowidget(self.tabControl.select())
+        if tab is self.statisticsTab:
+            self.buildStatisticsTab() # built again every time, as a session might have ended since
+            return
+        if tab in self.builtTabs:
+            return
+        self.builtTabs.add(tab)
+        if tab is self.settingsTab:
+            self.buildSettingsTab()
+        elif tab is self.aboutTab:
+            self.buildAboutTab()
 
+    def buildSettingsTab(self):
         settingsNote = tk.Label(self.settingsTab, text="You can't change any settings while writing (that would be a distraction).") 
         settingsNote.pack(pady=20)
 
@@ -336,8 +3109,7 @@ class WriterConfigurator():
         self.errorLabel = tk.Label(self.settingsTab, fg='#ff3333', text='')
         self.errorLabel.pack(pady=20)
 
-        self.loadSettingsFromFile()
-
+        self.showSettings()
 
         buttonFrame = tk.Frame(self.settingsTab)
 
@@ -349,9 +3121,43 @@ class WriterConfigurator():
 
         buttonFrame.pack()
 
-        ##############
-        # About Tab
+    def buildStatisticsTab(self):
+        for widget in self.statisticsTab.winfo_children():
+            widget.destroy()
 
+        if not os.path.exists(STATISTICS_FILENAME):
+            noStatisticsLabel = tk.Label(self.statisticsTab, text="No sessions yet. Once you've written something, you'll find your statistics here.")
+            noStatisticsLabel.pack(pady=20)
+            return
+
+        try:
+            statistics = SessionStatistics()
+            summary = statistics.summary()
+            statistics.close()
+        except Exception as exception:
+            errorLabel = tk.Label(self.statisticsTab, fg='#ff3333', text=f'Could not load the statistics: {exception}')
+            errorLabel.pack(pady=20)
+            return
+
+        hours, minutes = divmod(round(summary['seconds'] / 60), 60)
+        totalsLabel = tk.Label(self.statisticsTab, text=f"{summary['words']} words in {summary['sessions']} sessions ({hours} h {minutes} min), {summary['goals']} goals reached")
+        totalsLabel.pack(padx=10, pady=(10, 0), anchor='w')
+
+        speedLabel = tk.Label(self.statisticsTab, text=f"Average speed: {summary['wordsPerMinute']:.1f} words per minute")
+        speedLabel.pack(padx=10, anchor='w')
+
+        streakLabel = tk.Label(self.statisticsTab, text=f"Streak: {summary['currentStreak']} days in a row (longest: {summary['longestStreak']})")
+        streakLabel.pack(padx=10, pady=(0, 10), anchor='w')
+
+        daysTable = ttk.Treeview(self.statisticsTab, columns=('words', 'minutes'), height=6)
+        daysTable.heading('#0', text='Day')
+        daysTable.heading('words', text='Words')
+        daysTable.heading('minutes', text='Minutes')
+        for day, words, seconds in summary['recent']:
+            daysTable.insert('', 'end', text=day, values=(words, round(seconds / 60)))
+        daysTable.pack(padx=10, fill='x')
+
+    def buildAboutTab(self):
         aboutLabel1 = tk.Label(self.aboutTab, text="A_WritingProgram is a portable, distraction-free software for writing (i.e. a writing program).")
         aboutLabel1.pack(padx=10, pady=20,anchor='w')
 
@@ -369,16 +3175,19 @@ class WriterConfigurator():
 
         projectLink = tk.Label(self.aboutTab, text="GitHub Project", fg="#3066DD", cursor="hand2")
         projectLink.pack(padx=10, pady=10,anchor='w')
-        projectLink.bind("<Button-1>", lambda e: webbrowser.open_new("https://github.com/SpeedyNurBesser/A_WritingProgram"))
+        projectLink.bind("<Button-1>", self.openProjectPage)
 
 
         aboutLabel5 = tk.Label(self.aboutTab, text="(P.S. You can star the GitHub Project if you like.)")
         aboutLabel5.pack(padx=10, pady=10,anchor='w')
 
+    def openProjectPage(self, event=None):
+        import webbrowser # only imported when it's needed, as it takes a while to import
+        webbrowser.open_new("https://github.com/SpeedyNurBesser/A_WritingProgram")
 
-        self.root.mainloop()
-    
     def selectFile(self):
+        from tkinter import filedialog as fd # only needed once you browse for a file
+
         filetypes = (
             ('Markdown files', '*.md'),
             ('Text files', '*.txt *.md'),
@@ -393,6 +3202,15 @@ class WriterConfigurator():
 
         self.fileLabel.config(text=self.filename, fg='#000000')
 
+    def selectProject(self):
+        # a directory with your chapters (in the order of its chapters.txt or in alphabetical order)
+        from tkinter import filedialog as fd
+
+        directory = fd.askdirectory(title= 'Select a project directory', initialdir= '/')
+        if directory:
+            self.filename = directory
+            self.fileLabel.config(text=self.filename, fg='#000000')
+
     def inputIsValid(self):
         if self.filename == '':
             self.fileLabel.config(text='You need to select a file!', fg='#ff3333')
@@ -421,56 +3239,90 @@ class WriterConfigurator():
         if not self.inputIsValid():
             return
         
+        project = None
+        if isProject(self.filename):
+            try:
+                project = Project(self.filename)
+            except (OSError, ValueError) as exception:
+                self.fileLabel.config(text=f'Could not open the project: {exception}', fg='#ff3333')
+                return
+
         writer = Writer(
             fileLocation= self.filename,
             blockStyle= int(self.blockStyle.get()),
             blockValue= int(self.blockValue.get()),
             autosaveInterval= self.autosaveInterval,
-            displayHeader= self.displayHeader
+            displayHeader= self.displayHeader,
+            instrumentation= self.instrumentation,
+            project= project,
+            dictionary= self.dictionary,
+            virtual= self.virtualEditing
             )
     
-    def setDefaultSettings(self):
-        # defaultSettings
-        self.headerVar.set(1)
-        self.autosaveIntervalEntry.delete(0, 'end')
-        self.autosaveIntervalEntry.insert(1, '300')
-        self.applySettings()
-
-    def loadSettingsFromFile(self):
-        #directory = os.path.dirname(os.path.abspath(__file__))
-        #directory = directory + '\settings.json'
+    def exportFile(self):
+        # exports the selected file (or project) to html or plain text; that happens on another thread, so the window doesn't freeze meanwhile
+        if self.filename == '':
+            self.fileLabel.config(text='You need to select a file!', fg='#ff3333')
+            return
+        from tkinter import filedialog as fd
+
+        target = fd.asksaveasfilename(
+            title= 'Export to',
+            defaultextension= '.html',
+            filetypes= (('HTML files', '*.html'), ('Text files', '*.txt'))
+        )
+        if not target:
+            return
 
-        # I'm a bit more caucious than usually
-        if os.path.exists(SETTINGS_FILENAME):
-            try:
-                file = open(SETTINGS_FILENAME, 'r')
-            except:
-                print(f'Could not open "{SETTINGS_FILENAME}"; loading default settings.')
-                self.setDefaultSettings()
-                return None
+        try:
+            sources = Project(self.filename).chapters if isProject(self.filename) else [self.filename]
+        except (OSError, ValueError) as exception:
+            self.fileLabel.config(text=f'Could not open the project: {exception}', fg='#ff3333')
+            return
 
+        self.exportResults = queue.Queue()
+        def export():
             try:
-                settings = json.load(file)
-            except:
-                print(f'Could not load "{SETTINGS_FILENAME}"; loading default settings instead.')
-                self.setDefaultSettings()
+                exportManuscript(sources, target)
+            except Exception as exception:
+                self.exportResults.put((f'Export failed: {exception}', '#ff3333'))
             else:
-                try:
-                    self.autosaveIntervalEntry.insert(1, settings["autosaveInterval"])
-                    if settings["displayHeader"]:
-                        self.headerVar.set(1)
-                    else:
-                        self.headerVar.set(0)
-                    self.applySettings()
-                except:
-                    print(f'"{SETTINGS_FILENAME}" seems to be not initialized correctly; loading default settings instead.')
-                    self.setDefaultSettings()
-            finally:
-                    file.close()
-     
-        else:
-            print('No settings found, loading default settings.')
-            self.setDefaultSettings()
+                self.exportResults.put((f'Exported to {target}', '#000000'))
+        threading.Thread(target=export, daemon=True).start()
+        self.fileLabel.config(text='Exporting...', fg='#000000')
+        self.root.after(SAVE_POLL_INTERVAL, self.checkExport)
+
+    def checkExport(self):
+        try:
+            message, color = self.exportResults.get_nowait()
+        except queue.Empty:
+            self.root.after(SAVE_POLL_INTERVAL, self.checkExport)
+            return
+        self.fileLabel.config(text=message, fg=color)
+
+    def loadSettingsFromFile(self):
+        #directory = os.path.dirname(os.path.abspath(__file__))
+        #directory = directory + '\settings.json'
+        settings, message = readSettings()
+        if message is not None:
+            print(message)
+        self.useSettings(settings)
+
+    def useSettings(self, settings):
+        self.autosaveInterval = settings["autosaveInterval"]
+        self.displayHeader = settings["displayHeader"]
+        self.instrumentation = settings["instrumentation"] # not in the settings tab; can only be switched on in settings.json
+        self.dictionary = settings["dictionary"] # not in the settings tab either
+        self.virtualEditing = settings["virtualEditing"] # neither is this
+        self.showSettings()
+
+    def showSettings(self):
+        # puts the current settings into the settings tab (if it has been built yet)
+        if not hasattr(self, 'autosaveIntervalEntry'):
+            return
+        self.headerVar.set(1 if self.displayHeader else 0)
+        self.autosaveIntervalEntry.delete(0, 'end')
+        self.autosaveIntervalEntry.insert(0, str(self.autosaveInterval))
 
     def settingsAreValid(self):
         # a checkbutton can't be un-valid
@@ -505,7 +3357,7 @@ class WriterConfigurator():
             self.errorLabel.config(text=f'Could not open {SETTINGS_FILENAME}!', fg='#ff3333')
             return
         else:
-            settingDict = {"displayHeader": bool(self.headerVar.get()), "autosaveInterval": int(self.autosaveIntervalEntry.get())}
+            settingDict = {"displayHeader": bool(self.headerVar.get()), "autosaveInterval": int(self.autosaveIntervalEntry.get()), "instrumentation": self.instrumentation, "dictionary": self.dictionary, "virtualEditing": self.virtualEditing}
             settingDict = json.dumps(settingDict)
 
             try:
@@ -528,8 +3380,91 @@ class WriterConfigurator():
         self.writeSettingsToFile()
         self.applySettings()
 
+def parseArguments():
+    import argparse # only needed when started from the command line
+
+    parser = argparse.ArgumentParser(description='A portable, distraction-free writing program. Without a file the configuration window is opened; with one the writer starts right away.')
+    parser.add_argument('file', nargs='?', help='the file to write to, or a project directory (skips the configuration window)')
+    block = parser.add_mutually_exclusive_group()
+    block.add_argument('--minutes', type=int, help='block everything until this many minutes have passed')
+    block.add_argument('--words', type=int, help='block everything until this many words are written')
+    parser.add_argument('--autosave', type=int, help='interval for autosaves in seconds (default: from settings.json)')
+    header = parser.add_mutually_exclusive_group()
+    header.add_argument('--header', dest='displayHeader', action='store_true', default=None, help='show the "A_WritingProgram" header')
+    header.add_argument('--no-header', dest='displayHeader', action='store_false', help="don't show the header")
+    parser.add_argument('--instrumentation', choices=INSTRUMENTATION_MODES, help='record timing statistics (see README)')
+    parser.add_argument('--export', metavar='OUTPUT', help='export the file (or project) to OUTPUT (.html or .txt) instead of opening it')
+    parser.add_argument('--dictionary', help='a word list (one word per line) to check your spelling with (default: from settings.json)')
+    parser.add_argument('--virtual', action='store_true', default=None, help='only keep the lines around the view in the text box, for very long files (default: from settings.json)')
+    arguments = parser.parse_args()
+
+    if arguments.file is not None and not os.path.isfile(arguments.file) and not os.path.isdir(arguments.file):
+        parser.error(f'"{arguments.file}" is neither a file nor a project directory; create it first, if you start anew')
+    if arguments.export is not None and arguments.file is None:
+        parser.error('--export needs a file or project to export')
+    if arguments.export is not None and os.path.splitext(arguments.export)[1].lower() not in EXPORT_FORMATS:
+        parser.error(f'--export can only write {", ".join(EXPORT_FORMATS)} files')
+    for option in ('minutes', 'words', 'autosave'):
+        value = getattr(arguments, option)
+        if value is not None and value <= 0:
+            parser.error(f"--{option} can't be zero or lower")
+    return arguments
+
+def exportFromCommandLine(arguments):
+    try:
+        sources = Project(arguments.file).chapters if isProject(arguments.file) else [arguments.file]
+        startTime = time.perf_counter()
+        exportManuscript(sources, arguments.export)
+    except (OSError, ValueError) as exception:
+        raise SystemExit(f'Export failed: {exception}')
+    print(f'Exported {len(sources)} file(s) to "{arguments.export}" ({(time.perf_counter() - startTime) * 1000:.0f} ms).')
+
+def startFromCommandLine(arguments):
+    # starts the Writer directly, without building the configuration window first
+    settings, message = readSettings()
+    if message is not None:
+        print(message)
+
+    if arguments.minutes is not None:
+        blockStyle, blockValue = 1, arguments.minutes
+    elif arguments.words is not None:
+        blockStyle, blockValue = 2, arguments.words
+    else:
+        blockStyle, blockValue = 0, 1
+
+    project = None
+    if isProject(arguments.file):
+        try:
+            project = Project(arguments.file)
+        except (OSError, ValueError) as exception:
+            raise SystemExit(f'Could not open the project: {exception}')
+
+    Writer(
+        fileLocation= arguments.file,
+        project= project,
+        blockStyle= blockStyle,
+        blockValue= blockValue,
+        autosaveInterval= arguments.autosave or settings["autosaveInterval"],
+        displayHeader= settings["displayHeader"] if arguments.displayHeader is None else arguments.displayHeader,
+        instrumentation= arguments.instrumentation or settings["instrumentation"],
+        dictionary= arguments.dictionary if arguments.dictionary is not None else settings["dictionary"],
+        virtual= arguments.virtual or settings["virtualEditing"],
+        launchTime= LAUNCH_TIME
+        )
+
 if __name__ == '__main__':
-    WriterConfigurator()
+    import sys
+    if getattr(sys, 'frozen', False): # only the .exe needs this to start the export's worker processes; importing multiprocessing would slow down every launch
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    arguments = parseArguments()
+    if arguments.file is None:
+        WriterConfigurator()
+    elif arguments.export is not None:
+        exportFromCommandLine(arguments)
+    else:
+        startFromCommandLine(arguments)
 
     #TODO: possible future settings:
     # - dark mode (i like #272D2D)